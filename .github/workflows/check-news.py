@@ -1,27 +1,139 @@
+#!/usr/bin/env python
+
 """Check if the PR has a news item.
 
 Put a warning comment and return `assert False` if the PR does not contain a news file.
+
+The PR's files and comments are fetched together with the GitHub GraphQL API, 100 at a
+time, and paging stops as soon as a news file has been added and the bot's comment has
+been found, so most PRs are checked with a single API call.
+
+Run `python check-news.py --local [--base main]` to check a branch before pushing it. The
+news files committed since the merge base with `--base`, or with `origin/<base>` when there
+is no local branch of that name, are found with `git diff` and each of them is validated
+against the categories of `news/TEMPLATE.rst`. This mode needs neither network access nor
+GitHub credentials and is also available as the `check-news` pre-commit hook, which runs
+at the pre-push stage so that work-in-progress commits are not blocked.
 """
 
+import argparse
 import os
+import re
+import subprocess
+import sys
 from fnmatch import fnmatch
 
-from github import Github, PullRequest
+GRAPHQL_URL = "https://api.github.com/graphql"
 
+PR_QUERY = """
+query(
+  $owner: String!, $name: String!, $number: Int!,
+  $filesAfter: String, $withFiles: Boolean!,
+  $commentsAfter: String, $withComments: Boolean!
+) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      id
+      files(first: 100, after: $filesAfter) @include(if: $withFiles) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path changeType }
+      }
+      comments(first: 100, after: $commentsAfter) @include(if: $withComments) {
+        pageInfo { hasNextPage endCursor }
+        nodes { id body author { login } }
+      }
+    }
+  }
+}
+"""
 
-def get_added_files(pr: PullRequest.PullRequest):
-    print(pr, pr.number)
-    for file in pr.get_files():
-        if file.status == "added":
-            yield file.filename
+DELETE_COMMENT_MUTATION = """
+mutation($id: ID!) {
+  deleteIssueComment(input: {id: $id}) { clientMutationId }
+}
+"""
+
+ADD_COMMENT_MUTATION = """
+mutation($subjectId: ID!, $body: String!) {
+  addComment(input: {subjectId: $subjectId, body: $body}) { clientMutationId }
+}
+"""
+
+WARNING_COMMENT = """\
+**Warning!** No news item is found for this PR. If this is a user-facing change/feature/fix,
+please add a news item by copying the format from `news/TEMPLATE.rst`.
+For best practices, please visit
+https://scikit-package.github.io/scikit-package/frequently-asked-questions.html#billinge-group-standards.
+"""
 
 
-def check_news_file(pr):
+def run_graphql(session, query, variables):
+    response = session.post(
+        GRAPHQL_URL, json={"query": query, "variables": variables}, timeout=30
+    )
+    response.raise_for_status()
+    data = response.json()
+    if data.get("errors"):
+        raise Exception(f"GitHub GraphQL API error: {data['errors']}")
+    return data["data"]
+
+
+def check_news_file(files):
+    """Return True if any of the files is an added news/*.rst file."""
     return any(
-        map(lambda file_name: fnmatch(file_name, "news/*.rst"), get_added_files(pr))
+        file["changeType"] == "ADDED" and fnmatch(file["path"], "news/*.rst")
+        for file in files
     )
 
 
+def get_old_comment(comments):
+    for comment in comments:
+        login = (comment["author"] or {}).get("login", "")
+        if ("github-actions" in login) and ("No news item is found" in comment["body"]):
+            return comment
+
+
+def fetch_news_status(session, owner, name, number):
+    """
+    Return the PR's node ID, whether a news file was added, and the bot's old comment.
+
+    Files and comments are paged together and each is only paged further while
+    the answer is still unknown.
+    """
+    variables = {
+        "owner": owner,
+        "name": name,
+        "number": number,
+        "filesAfter": None,
+        "withFiles": True,
+        "commentsAfter": None,
+        "withComments": True,
+    }
+    has_news_added = False
+    old_comment = None
+    while True:
+        pr = run_graphql(session, PR_QUERY, variables)["repository"]["pullRequest"]
+
+        if variables["withFiles"]:
+            files = pr["files"]
+            has_news_added = check_news_file(files["nodes"])
+            variables["filesAfter"] = files["pageInfo"]["endCursor"]
+            variables["withFiles"] = (
+                not has_news_added and files["pageInfo"]["hasNextPage"]
+            )
+
+        if variables["withComments"]:
+            comments = pr["comments"]
+            old_comment = get_old_comment(comments["nodes"])
+            variables["commentsAfter"] = comments["pageInfo"]["endCursor"]
+            variables["withComments"] = (
+                old_comment is None and comments["pageInfo"]["hasNextPage"]
+            )
+
+        if not variables["withFiles"] and not variables["withComments"]:
+            return pr["id"], has_news_added, old_comment
+
+
 def get_pr_number():
     number = os.environ["PR_NUMBER"]
     if not number:
@@ -29,39 +141,159 @@ def get_pr_number():
     return int(number)
 
 
-def get_old_comment(pr: PullRequest.PullRequest):
-    for comment in pr.get_issue_comments():
-        if ("github-actions" in comment.user.login) and (
-            "No news item is found" in comment.body
-        ):
-            return comment
+def get_template_categories(template_path="news/TEMPLATE.rst"):
+    """Return the categories listed in the news template."""
+    with open(template_path, "r") as file:
+        return [
+            line.strip().strip("**:").strip()
+            for line in file
+            if line.strip().startswith("**") and line.strip().endswith(":**")
+        ]
+
+
+def git(*args):
+    return subprocess.run(
+        ["git", *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def resolve_base(base="main"):
+    """
+    Return the ref to compare the local branch with, or None if none exists.
+
+    CI checkouts often have no local main branch, so origin/<base> is used
+    when <base> itself is missing.
+    """
+    for ref in (base, f"origin/{base}"):
+        result = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            return ref
+    return None
+
+
+def get_local_added_news_files(base="main"):
+    """Return the news/*.rst files committed since the merge base of `base` and HEAD."""
+    merge_base = git("merge-base", base, "HEAD").strip()
+    diff = git("diff", "--name-status", "--diff-filter=A", merge_base, "HEAD")
+    added_files = [line.split("\t")[-1] for line in diff.splitlines() if line]
+    return [file for file in added_files if fnmatch(file, "news/*.rst")]
+
+
+def validate_news_file(file_path, categories):
+    """Return a list of problems found in a news file."""
+    problems = []
+    current_category = None
+    has_item = False
+    with open(file_path, "r") as file:
+        for line_number, line in enumerate(file, start=1):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith("**") and stripped.endswith(":**"):
+                current_category = stripped.strip("**:").strip()
+                if current_category not in categories:
+                    problems.append(
+                        f"{file_path}:{line_number}: unknown category "
+                        f"'{current_category}', expected one of {', '.join(categories)}"
+                    )
+            elif current_category is None:
+                problems.append(
+                    f"{file_path}:{line_number}: content before the first category header"
+                )
+            elif stripped.startswith("* "):
+                if not re.match(r"\*\s*<news item>", stripped):
+                    has_item = True
+            elif not line.startswith((" ", "\t")):
+                problems.append(
+                    f"{file_path}:{line_number}: expected a '* ' bullet or an indented "
+                    "continuation line"
+                )
+    if not has_item:
+        problems.append(
+            f"{file_path}: no news item found; replace a '* <news item>' placeholder, "
+            "or add '* no news: <reason>' if the change is not user-facing"
+        )
+    return problems
+
+
+def check_local(base="main", template_path="news/TEMPLATE.rst"):
+    """Check the news files added on the local branch and return the problems found."""
+    ref = resolve_base(base)
+    if ref is None:
+        return [
+            f"Neither {base} nor origin/{base} is found. Fetch the branch the "
+            "local branch is based on, or pass it with --base."
+        ]
+    try:
+        added_files = get_local_added_news_files(ref)
+    except subprocess.CalledProcessError as e:
+        # e.g. a shallow clone that does not reach the merge base
+        return [f"Could not compare HEAD with {ref}: {e.stderr.strip()}"]
+    news_files = [
+        file for file in added_files if os.path.basename(file) != "TEMPLATE.rst"
+    ]
+    if not news_files:
+        return [
+            f"No news item is found since {base}. If this is a user-facing "
+            "change/feature/fix, please add a news item by copying the format "
+            f"from `{template_path}`."
+        ]
+    categories = get_template_categories(template_path)
+    problems = []
+    for file in news_files:
+        problems.extend(validate_news_file(file, categories))
+    return problems
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Check if the PR has a news item.")
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Check the news files added on the local branch with git instead of "
+        "the GitHub PR.",
+    )
+    parser.add_argument(
+        "--base",
+        default="main",
+        help="Branch the local branch is compared with (default: main).",
+    )
+    args = parser.parse_args()
+
+    if args.local:
+        problems = check_local(args.base)
+        for problem in problems:
+            print(problem)
+        sys.exit(1 if problems else 0)
+
+    # requests is only needed to talk to GitHub
+    import requests
+
     # using an access token
-    gh = Github(os.environ["GITHUB_TOKEN"])
-    repo = gh.get_repo(os.environ["GITHUB_REPOSITORY"])
-    pr = repo.get_pull(get_pr_number())
-    has_news_added = check_news_file(pr)
-    old_comment = get_old_comment(pr)
+    session = requests.Session()
+    session.headers["Authorization"] = f"bearer {os.environ['GITHUB_TOKEN']}"
+    owner, name = os.environ["GITHUB_REPOSITORY"].split("/")
+    pr_id, has_news_added, old_comment = fetch_news_status(
+        session, owner, name, get_pr_number()
+    )
 
     if has_news_added:
         if old_comment:
             print("Found an existing comment from bot")
             print("Delete warning from bot, since news item is added.")
-            old_comment.delete()
+            run_graphql(session, DELETE_COMMENT_MUTATION, {"id": old_comment["id"]})
     else:
         print("No news item found")
         if old_comment:
             print("Old warning remains relevant, no action needed.")
         else:
-            pr.create_issue_comment(
-                """\
-**Warning!** No news item is found for this PR. If this is a user-facing change/feature/fix,
-please add a news item by copying the format from `news/TEMPLATE.rst`.
-For best practices, please visit
-https://scikit-package.github.io/scikit-package/frequently-asked-questions.html#billinge-group-standards.
-"""
+            run_graphql(
+                session,
+                ADD_COMMENT_MUTATION,
+                {"subjectId": pr_id, "body": WARNING_COMMENT},
             )
         assert False
 
@@ -1,25 +1,112 @@
+import hashlib
+import json
+import os
 import re
 import sys
 
+# Regex to match version headings such as 1.2.0 or 1.2.0rc1
+version_pattern = re.compile(r"^\d+\.\d+\.\d+\S*$")
+
+# Same cache directory as http_cache.py, which this script runs without
+CACHE_DIR = os.environ.get(
+    "RELEASE_SCRIPTS_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "release-scripts"),
+)
+
+
+def get_file_hash(filepath):
+    """Return the SHA256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def get_tag_news_items(tag, filepath):
-    """Collect news items after the specified tag until the next version is found."""
-    collect = False
-    collected_lines = []
-    # Regex to match version numbers
-    version_pattern = re.compile(r"^\d+\.\d+\.\d+")
 
-    with open(filepath, "r") as file:
+def get_index_path(filepath):
+    """Return the path of the index file of a changelog in the user cache.
+
+    The index is keyed by the absolute path of the changelog, so that nothing
+    is written next to it in the working tree.
+    """
+    digest = hashlib.sha256(os.path.abspath(filepath).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "changelog-index", f"{digest}.json")
+
+
+def build_changelog_index(filepath):
+    """Record the byte range of each version section in CHANGELOG.rst.
+
+    A version heading is a line holding only the version, underlined on the
+    next line. Each section starts right after its heading and ends at the
+    next heading or at the end of the file.
+    """
+    headings = []
+    previous = None
+    offset = 0
+    with open(filepath, "rb") as file:
         for line in file:
-            if line.strip().startswith(tag):
-                collect = True
+            stripped = line.strip().decode()
+            if previous is not None and stripped.startswith("="):
+                headings.append(previous)
+            previous = None
+            if version_pattern.match(stripped):
+                previous = (stripped, offset, offset + len(line))
+            offset += len(line)
+
+    sections = {}
+    for i, (tag, _, start) in enumerate(headings):
+        end = headings[i + 1][1] if i + 1 < len(headings) else offset
+        # Keep the first (latest) section if a version appears twice
+        sections.setdefault(tag, [start, end])
+    return sections
+
+
+def load_changelog_index(filepath):
+    """Return the changelog index, rebuilding the cached index if the changelog changed."""
+    file_hash = get_file_hash(filepath)
+    index_path = get_index_path(filepath)
+    try:
+        with open(index_path, "r") as file:
+            index = json.load(file)
+        if index["sha256"] == file_hash:
+            return index["sections"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    sections = build_changelog_index(filepath)
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path, "w") as file:
+            json.dump({"sha256": file_hash, "sections": sections}, file)
+    except OSError:
+        # The index is only a cache
+        pass
+    return sections
+
+
+def get_tags_news_items(tags, filepath):
+    """Collect the news items of several tags with one index lookup each.
+
+    Return a dictionary mapping each tag to its lines, which are empty if the
+    tag is not found in the changelog.
+    """
+    sections = load_changelog_index(filepath)
+    news_items = {}
+    with open(filepath, "rb") as file:
+        for tag in tags:
+            if tag not in sections:
+                news_items[tag] = []
                 continue
-            elif collect and version_pattern.match(line.strip()):
-                break
-            elif collect:
-                collected_lines.append(line.rstrip())
+            start, end = sections[tag]
+            file.seek(start)
+            text = file.read(end - start).decode()
+            news_items[tag] = [line.rstrip() for line in text.splitlines()]
+    return news_items
 
-    return collected_lines
+
+def get_tag_news_items(tag, filepath):
+    """Collect news items after the specified tag until the next version is found."""
+    return get_tags_news_items([tag], filepath)[tag]
 
 
 def remove_two_lines(lines):
@@ -29,8 +116,8 @@ def remove_two_lines(lines):
         if "====" in lines[0]:
             lines.pop(0)
         # Remove the second empty line
-        if lines[1] == "":
-            lines.pop(1)
+        if lines and lines[0] == "":
+            lines.pop(0)
     return lines
 
 
@@ -48,11 +135,17 @@ if __name__ == "__main__":
             False
         ), "No tag has been provided. Please provide a tag by running python get-latest-changelog.py <tag>"
 
-    tag = sys.argv[1]
+    tags = sys.argv[1:]
     CHANGELOG_PATH = "CHANGELOG.rst"
     LATEST_CHANGELOG_PATH = "CHANGELOG.txt"
 
-    collected_lines = get_tag_news_items(tag, CHANGELOG_PATH)
-    cleaned_lines = remove_two_lines(collected_lines)
-    latest_changelog_output = save_to_txt_file(cleaned_lines, LATEST_CHANGELOG_PATH)
-    print(f"CHANGELOG for {tag}:\n{latest_changelog_output}")
+    # With several tags, e.g. to backfill GitHub release notes, the notes of
+    # each tag are saved to CHANGELOG-<tag>.txt
+    tags_news_items = get_tags_news_items(tags, CHANGELOG_PATH)
+    for tag, collected_lines in tags_news_items.items():
+        cleaned_lines = remove_two_lines(collected_lines)
+        output_path = (
+            LATEST_CHANGELOG_PATH if len(tags) == 1 else f"CHANGELOG-{tag}.txt"
+        )
+        latest_changelog_output = save_to_txt_file(cleaned_lines, output_path)
+        print(f"CHANGELOG for {tag}:\n{latest_changelog_output}")
@@ -0,0 +1,165 @@
+"""
+Run the changelog steps of a full release in one pass.
+
+The news files are merged into CHANGELOG.rst, the release notes of the tag are
+taken from the section that was just written, and the news files are removed,
+all in one process. The release notes are saved to a text file and printed
+together with the new CHANGELOG.rst section. When run in GitHub Actions, they
+are also set as the `release-notes` step output so later jobs can use them
+without checking out the repository again.
+
+The steps are implemented by the sibling scripts update-changelog.py and
+get-latest-changelog.py, which are imported from this directory, so the
+pipeline also works from a plain checkout of release-scripts:
+
+    python release_pipeline.py <tag> [--notes-file CHANGELOG.txt] [--trace PATH]
+
+Each step is timed with tracing.py from the root of release-scripts when it
+is checked out next to this directory; see tracing.py for the trace formats.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import uuid
+from contextlib import nullcontext
+from glob import glob
+
+WORKFLOWS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(WORKFLOWS_DIR))
+
+
+def load_module(module_name, path):
+    """Import a Python file as a module, reusing it if it is already imported."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_script(name):
+    """Import a script of this directory with a hyphenated name as a module."""
+    return load_module(
+        name.replace("-", "_"), os.path.join(WORKFLOWS_DIR, f"{name}.py")
+    )
+
+
+update_changelog = load_script("update-changelog")
+get_latest_changelog = load_script("get-latest-changelog")
+
+if os.path.exists(os.path.join(REPO_DIR, "tracing.py")):
+    tracing = load_module("tracing", os.path.join(REPO_DIR, "tracing.py"))
+    span = tracing.span
+else:
+    tracing = None
+
+    def span(name, /, **attrs):
+        return nullcontext()
+
+
+def get_news_files(news_dir="news"):
+    """Return the news .rst files of a release, without TEMPLATE.rst."""
+    return sorted(
+        path
+        for path in glob(os.path.join(news_dir, "*.rst"))
+        if os.path.basename(path) != "TEMPLATE.rst"
+    )
+
+
+def update_changelog_file(tag, news_files, changelog_path="CHANGELOG.rst"):
+    """Merge the news files into CHANGELOG.rst and return the new section."""
+    with span("changelog.collect_news", files=len(news_files)):
+        news_items = update_changelog.collect_news_items(news_files)
+    with span("changelog.write", path=str(changelog_path)):
+        return update_changelog.write_merged_file(tag, news_items, changelog_path)
+
+
+def extract_release_notes(tag, news_section):
+    """Return the release notes of a tag from its CHANGELOG.rst section."""
+    lines = [line.rstrip() for line in news_section.splitlines()]
+    # Drop everything up to and including the version heading
+    if tag in lines:
+        lines = lines[lines.index(tag) + 1 :]
+    lines = get_latest_changelog.remove_two_lines(lines)
+    while lines and lines[-1] == "":
+        lines.pop()
+    return "\n".join(lines)
+
+
+def clean_news(news_dir="news"):
+    """Remove the merged news files, keeping TEMPLATE.rst."""
+    update_changelog.remove_news_rst_files(news_dir)
+
+
+def write_github_output(name, value):
+    """Set a step output when running in GitHub Actions."""
+    output_path = os.environ.get("GITHUB_OUTPUT")
+    if not output_path:
+        return
+    delimiter = f"EOF-{uuid.uuid4().hex}"
+    with open(output_path, "a") as file:
+        file.write(f"{name}<<{delimiter}\n{value}\n{delimiter}\n")
+
+
+def run_release(
+    tag,
+    news_dir="news",
+    changelog_path="CHANGELOG.rst",
+    notes_path="CHANGELOG.txt",
+):
+    """
+    Update CHANGELOG.rst, extract the release notes and remove the news files.
+
+    Return the release notes and the new CHANGELOG.rst section.
+    """
+    news_section = update_changelog_file(tag, get_news_files(news_dir), changelog_path)
+    with span("changelog.release_notes", tag=tag):
+        release_notes = extract_release_notes(tag, news_section)
+        if notes_path:
+            get_latest_changelog.save_to_txt_file(
+                release_notes.splitlines(), notes_path
+            )
+    with span("changelog.clean_news"):
+        clean_news(news_dir)
+    return release_notes, news_section
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update CHANGELOG.rst and extract the release notes of a tag."
+    )
+    parser.add_argument("tag", help="Tag of the release, e.g. 1.2.0.")
+    parser.add_argument("--news-dir", default="news", help="Default: news.")
+    parser.add_argument(
+        "--changelog", default="CHANGELOG.rst", help="Default: CHANGELOG.rst."
+    )
+    parser.add_argument(
+        "--notes-file",
+        default="CHANGELOG.txt",
+        help="File the release notes are saved to (default: CHANGELOG.txt).",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record timing spans to PATH (needs tracing.py).",
+    )
+    args = parser.parse_args()
+    if args.trace:
+        if tracing is None:
+            parser.error("--trace needs tracing.py from the root of release-scripts.")
+        tracing.enable_tracing(args.trace)
+
+    release_notes, news_section = run_release(
+        args.tag, args.news_dir, args.changelog, args.notes_file
+    )
+    write_github_output("release-notes", release_notes)
+    print(f"New section of {args.changelog}:\n{news_section}")
+    print(f"CHANGELOG for {args.tag}:\n{release_notes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,24 @@
 import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
 
-# Get the GitHub reference passed as an argument
-tag = sys.argv[1]
-
-# Store category data
-news_items = {
-    "Added": [],
-    "Changed": [],
-    "Deprecated": [],
-    "Removed": [],
-    "Fixed": [],
-    "Security": [],
-}
+# News categories in the order of news/TEMPLATE.rst
+CATEGORIES = ["Added", "Changed", "Deprecated", "Removed", "Fixed", "Security"]
+CHANGELOG_HEADER = ".. current developments"
 
 
 def extract_news_items(file_path):
-    """Extract news bullet points under each category for each .rst file."""
+    """Extract news bullet points under each category for a single .rst file.
+
+    Return a dictionary mapping each category to the list of its items. Raise
+    ValueError if the file uses an unknown category or has content before the
+    first category header.
+    """
+    news_items = {category: [] for category in CATEGORIES}
+    current_category = None
     with open(file_path, "r") as file:
         for line in file:
             line = line.strip()
@@ -29,18 +30,35 @@ def extract_news_items(file_path):
             # Check if the line is a category header
             if line.startswith("**") and line.endswith(":**"):
                 current_category = line.strip("**:").strip()
+                if current_category not in news_items:
+                    raise ValueError(
+                        f"Unknown category '{current_category}' in {file_path}. "
+                        f"Expected one of: {', '.join(CATEGORIES)}."
+                    )
 
             # Only add if the line is not empty and not a category header
-            elif current_category and line and not line.startswith("* <news item>"):
+            elif line and not line.startswith("* <news item>"):
+                if current_category is None:
+                    raise ValueError(
+                        f"Found '{line}' before the first category header in {file_path}."
+                    )
                 news_items[current_category].append(line)
 
+    return news_items
+
 
-def write_merged_file():
-    """Add the news items under the ".. current developments" section."""
-    CHANGELOG_PATH = "CHANGELOG.rst"
-    CHANGELOG_HEADER = ".. current developments"
+def collect_news_items(file_paths, max_workers=None):
+    """Parse the news files in parallel and merge their items by category."""
+    news_items = {category: [] for category in CATEGORIES}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file_news_items in executor.map(extract_news_items, file_paths):
+            for category, items in file_news_items.items():
+                news_items[category].extend(items)
+    return news_items
 
-    # Insert news
+
+def format_news_section(tag, news_items):
+    """Format the CHANGELOG.rst section of a release."""
     new_news_content = f"\n{tag}\n=====\n\n"
     for category_name in sorted(news_items.keys()):
         items = news_items[category_name]
@@ -51,22 +69,36 @@ def write_merged_file():
                 # Add each item in the category
                 new_news_content += f"{item}\n"
             new_news_content += "\n"
+    return new_news_content
 
-    # Read CHANGELOG.rst
-    with open(CHANGELOG_PATH, "r") as file:
-        current_content = file.read()
-
-    # Find the position to insert news after ".. current developments"
-    insert_position = current_content.find(CHANGELOG_HEADER) + len(CHANGELOG_HEADER) + 1
-    final_content = (
-        current_content[:insert_position]
-        + new_news_content
-        + current_content[insert_position:]
-    )
 
-    # Write the updated content back to the file
-    with open(CHANGELOG_PATH, "w") as file:
-        file.write(final_content)
+def write_merged_file(tag, news_items, changelog_path="CHANGELOG.rst"):
+    """Add the news items under the ".. current developments" section.
+
+    CHANGELOG.rst is streamed line by line into a temporary file that then
+    atomically replaces it, so the whole changelog is never held in memory.
+    """
+    new_news_content = format_news_section(tag, news_items)
+    changelog_dir = os.path.dirname(os.path.abspath(changelog_path))
+    fd, tmp_path = tempfile.mkstemp(dir=changelog_dir, prefix=".CHANGELOG.")
+    try:
+        with open(changelog_path, "r") as src, os.fdopen(fd, "w") as dst:
+            # Copy up to and including the ".. current developments" line
+            for line in src:
+                dst.write(line)
+                if line.startswith(CHANGELOG_HEADER):
+                    break
+            else:
+                raise ValueError(f"'{CHANGELOG_HEADER}' not found in {changelog_path}.")
+
+            # Insert news and copy the rest of the changelog
+            dst.write(new_news_content)
+            shutil.copyfileobj(src, dst)
+        shutil.copymode(changelog_path, tmp_path)
+        os.replace(tmp_path, changelog_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
     return new_news_content
 
@@ -81,17 +113,22 @@ def remove_news_rst_files(news_dir_path):
 
 
 if __name__ == "__main__":
+    # Get the GitHub reference passed as an argument
+    tag = sys.argv[1]
     NEWS_DIR_PATH = "news"
 
     # Get all news .rst files
-    news_rst_files = glob(os.path.join(NEWS_DIR_PATH, "*.rst"))
+    news_rst_files = sorted(
+        path
+        for path in glob(os.path.join(NEWS_DIR_PATH, "*.rst"))
+        if os.path.basename(path) != "TEMPLATE.rst"
+    )
 
     # Extract and store news items into a single dictionary
-    for rst_file in news_rst_files:
-        extract_news_items(rst_file)
+    news_items = collect_news_items(news_rst_files)
 
     # Add news under ".. current developments"
-    new_news_content = write_merged_file()
+    new_news_content = write_merged_file(tag, news_items)
 
     # Remove all .rst files in the news directory except TEMPLATE.rst
     remove_news_rst_files(NEWS_DIR_PATH)
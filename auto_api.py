@@ -1,11 +1,21 @@
 #!/usr/bin/env python
 
+import ast
+import hashlib
+import json
 import optparse
+import os
 import shlex
 import subprocess
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from fsutils import atomic_write
+from http_cache import DEFAULT_CACHE_DIR
+from tracing import enable_tracing, span
+
 
 def call(cmd, cwd, capture_output=False):
     cmd_list = shlex.split(cmd)
@@ -26,62 +36,288 @@ def create_option_parser():
             [
                 "%prog <package_name> <path_to_package_proper> <path_to_api_directory>",
                 "Automatically populate the API directory for a package.",
-                "This only handles packages with single-depth submodules.",
+                "Subpackages are handled at any depth. To document a namespace package "
+                "split across distributions, pass all of its directories separated by "
+                f"'{os.pathsep}' as <path_to_package_proper>.",
             ]
         ),
         epilog="Please report bugs on https://github.com/Billingegroup/release-scripts/issues.",
     )
+    parser.add_option(
+        "-i",
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only rewrite .rst files whose content changed and remove stale files, "
+        "so that Sphinx can reuse its incremental build.",
+    )
+    parser.add_option(
+        "-a",
+        "--ast",
+        action="store_true",
+        default=False,
+        help="Parse each module to skip private, empty and non-package entries. "
+        f"Parsed modules are cached in {INDEX_DIR}.",
+    )
+    parser.add_option(
+        "--trace",
+        metavar="PATH",
+        help="Record timing spans to PATH (see tracing.py).",
+    )
 
     return parser
 
 
-def main(opts, pargs):
-    base_package_name = pargs[0].replace("-", "_")
-    base_package_dir = Path(pargs[1]).resolve()
-    api_dir = Path(pargs[2]).resolve()
+def write_api_files(api_dir, api_files, incremental=False):
+    """Write the generated files into the API directory.
+
+    Parameters
+    ----------
+
+    api_dir: Path
+        The API directory (e.g. /doc/source/api).
+    api_files: dict
+        The content of each file to write, keyed by file name.
+    incremental: bool
+        If False, every file in the API directory is removed and all files are
+        written again. If True, only files whose content differs are written
+        and only files that are no longer generated are removed, which keeps
+        the modification time of unchanged files.
+
+    Returns
+    -------
 
-    # Clean out API directory
-    for child in api_dir.iterdir():
-        if child.is_file():
+    written: list
+        The names of the files that were written.
+    removed: list
+        The names of the files that were removed.
+    """
+    existing = {
+        child.name: child
+        for child in api_dir.iterdir()
+        # Leave hidden files such as .gitignore
+        if child.is_file() and not child.name.startswith(".")
+    }
+    written = []
+    removed = []
+
+    for name, child in existing.items():
+        # Leave directories
+        if not incremental or name not in api_files:
             child.unlink()
+            removed.append(name)
+
+    for name, content in api_files.items():
+        path = api_dir / name
+        if incremental and name in existing:
+            with open(path, "r") as pfile:
+                if pfile.read() == content:
+                    continue
+        with span("auto_api.write", file=name):
+            with open(path, "w") as pfile:
+                pfile.write(content)
+        written.append(name)
+
+    return written, removed
+
+
+SKIP_DIRS = ["tests", "__pycache__"]
+SKIP_FILES = ["__init__", "version"]
+INDEX_DIR = DEFAULT_CACHE_DIR / "auto_api"
+
+
+def get_index_path(api_dir):
+    """Return the module index of an API directory in the user cache.
+
+    The index is kept out of the API directory so that it is never committed
+    with the documentation sources.
+    """
+    digest = hashlib.sha256(str(api_dir).encode()).hexdigest()[:16]
+    return INDEX_DIR / f"{digest}.json"
+
+
+def get_public_symbols(source):
+    """Find the public symbols defined at the top level of a module.
+
+    Parameters
+    ----------
+
+    source: str
+        The source code of the module.
+
+    Returns
+    -------
+
+    symbols: list
+        The names of the public functions, classes and variables.
+    all_names: list or None
+        The names listed in ``__all__``, or None if it is not a literal list.
+    """
+    tree = ast.parse(source)
+    symbols = []
+    all_names = None
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            targets = [node.name]
+        elif isinstance(node, ast.Assign):
+            targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            targets = [node.target.id]
         else:
-            # Leave directories
-            pass
+            continue
+        if "__all__" in targets and isinstance(node.value, (ast.List, ast.Tuple)):
+            all_names = [
+                elt.value
+                for elt in node.value.elts
+                if isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+            ]
+        symbols.extend(name for name in targets if not name.startswith("_"))
+    return symbols, all_names
 
-    # Populate API directory
-    def gen_package_files(package_dir, package_name):
-        """Generate package files.
 
-        Parameters
-        ----------
+class ModuleIndex:
+    """An on-disk index of the public symbols of each module.
+
+    Entries are keyed by module path and invalidated when the file's mtime or
+    size changes, so unchanged modules are never parsed again. A module that
+    cannot be parsed is documented by file name, as without the index.
+
+    Parameters
+    ----------
+
+    index_path: Path
+        The JSON file holding the index.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        try:
+            with open(index_path, "r") as ifile:
+                self.entries = json.load(ifile)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        self.used = {}
+        self.parsed = 0
+        self._lock = threading.Lock()
+
+    def get(self, module_path):
+        """Return the index entry of a module, parsing it if it changed."""
+        key = str(module_path)
+        stat = module_path.stat()
+        with self._lock:
+            entry = self.entries.get(key)
+        if (
+            entry is None
+            or entry["mtime_ns"] != stat.st_mtime_ns
+            or entry["size"] != stat.st_size
+        ):
+            try:
+                with open(module_path, "r", encoding="utf-8") as mfile:
+                    symbols, all_names = get_public_symbols(mfile.read())
+            except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+                print(
+                    f"Warning: could not parse {module_path}, documenting it anyway: {e}"
+                )
+                symbols, all_names = None, None
+            entry = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "symbols": symbols,
+                "all": all_names,
+            }
+            with self._lock:
+                self.parsed += 1
+        with self._lock:
+            self.entries[key] = entry
+            self.used[key] = entry
+        return entry
+
+    def is_documented(self, module_path):
+        """Return True if a module has anything for autodoc to document."""
+        if module_path.stem.startswith("_"):
+            return False
+        entry = self.get(module_path)
+        if entry["symbols"] is None:
+            return True
+        if entry["all"] is not None:
+            return len(entry["all"]) > 0
+        return len(entry["symbols"]) > 0
+
+    def save(self):
+        """Save the entries used in this run, dropping removed modules."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.index_path, json.dumps(self.used, indent=1, sort_keys=True))
+
+
+def scan_package_dir(package_dir):
+    """Find the subpackages and submodules of a package in a single scan.
+
+    Parameters
+    ----------
+
+    package_dir: Path
+        The package directory (e.g. /src/diffpy/pdfmorph).
+
+    Returns
+    -------
+
+    sp_paths: list
+        The paths of the subpackage directories.
+    sm_stems: list
+        The module names of the submodules.
+    """
+    sp_paths = []
+    sm_stems = []
+    with os.scandir(package_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name not in SKIP_DIRS:
+                    sp_paths.append(Path(entry.path))
+            elif entry.is_file() and entry.name.endswith(".py"):
+                stem = entry.name[: -len(".py")]
+                if stem not in SKIP_FILES:
+                    sm_stems.append(stem)
+    return sp_paths, sm_stems
 
-        package_dir: Path
-            The package directory (e.g. /src/diffpy/pdfmorph).
-        package_name: str
-            The name of the package (e.g. diffpy.pdfmorph).
-        """
-        eq_spacing = "=" * len(f"{package_name} package")
-        s = f""":tocdepth: -1
+
+def render_package_file(package_name, sp_names, sm_names, namespace=False):
+    """Render the .rst file of a package.
+
+    Parameters
+    ----------
+
+    package_name: str
+        The name of the package (e.g. diffpy.pdfmorph).
+    sp_names: list
+        The full names of the subpackages.
+    sm_names: list
+        The full names of the submodules.
+    namespace: bool
+        Whether the package is a PEP 420 namespace package, which has no
+        module of its own to document.
+    """
+    eq_spacing = "=" * len(f"{package_name} package")
+    parts = [
+        f""":tocdepth: -1
 
 {package_name.replace('_', '-')} package
 {eq_spacing}
-
+"""
+    ]
+    if not namespace:
+        parts.append(
+            f"""
 .. automodule:: {package_name}
     :members:
     :undoc-members:
     :show-inheritance:
 """
+        )
 
-        # Tag all subpackages
-        sp_names = []
-        sp_paths = []
-        skip_dirs = ["tests", "__pycache__"]
-        for child in package_dir.iterdir():
-            if child.is_dir() and child.name not in skip_dirs:
-                sp_names.append(f"{package_name}.{child.name}")
-                sp_paths.append(child)
-        if len(sp_names) > 0:
-            s += """
+    # Tag all subpackages
+    if len(sp_names) > 0:
+        parts.append(
+            """
 Subpackages
 -----------
 
@@ -89,27 +325,21 @@ Subpackages
     :titlesonly:
 
 """
-            for sp_name in sp_names:
-                s += f"    {sp_name}\n"
-
-        # Tag all submodules
-        sm_names = []
-        skip_files = ["__init__", "version"]
-        for child in package_dir.iterdir():
-            if (
-                child.is_file()
-                and child.suffix == ".py"
-                and child.stem not in skip_files
-            ):
-                sm_names.append(f"{package_name}.{child.stem}")
-        if len(sm_names) > 0:
-            s += """
+        )
+        parts.extend(f"    {sp_name}\n" for sp_name in sp_names)
+
+    # Tag all submodules
+    if len(sm_names) > 0:
+        parts.append(
+            """
 Submodules
 ----------
 """
-        for sm_name in sm_names:
-            dsh_spacing = "^" * len(f"{sm_name} module")
-            s += f"""
+        )
+    for sm_name in sm_names:
+        dsh_spacing = "^" * len(f"{sm_name} module")
+        parts.append(
+            f"""
 {sm_name} module
 {dsh_spacing}
 
@@ -118,17 +348,184 @@ Submodules
     :undoc-members:
     :show-inheritance:
 """
+        )
+
+    parts.append("\n")
+    return "".join(parts)
+
+
+def filter_package_entries(package_dir, sp_paths, sm_stems, index):
+    """Drop private and empty entries using the module index.
+
+    Directories without an ``__init__.py`` are kept as candidate namespace
+    packages and are pruned later if they contain nothing to document.
+    """
+    sp_paths = [path for path in sp_paths if not path.name.startswith("_")]
+    sm_stems = [
+        stem for stem in sm_stems if index.is_documented(package_dir / f"{stem}.py")
+    ]
+    return sp_paths, sm_stems
+
+
+def scan_package_node(package_dirs, package_name, index=None):
+    """Scan the directories of a single package.
+
+    A namespace package may be split across several directories, one per
+    distribution, whose contents are merged.
+
+    Returns
+    -------
+
+    node: dict
+        The package's ``namespace`` flag and the full names of its
+        ``subpackages`` and ``submodules``.
+    subpackages: list
+        (paths, name) tuples of the subpackages still to be scanned.
+    """
+    sp_dirs = {}
+    sm_names = []
+    namespace = True
+    for package_dir in package_dirs:
+        if (package_dir / "__init__.py").is_file():
+            namespace = False
+        sp_paths, sm_stems = scan_package_dir(package_dir)
+        if index is not None:
+            sp_paths, sm_stems = filter_package_entries(
+                package_dir, sp_paths, sm_stems, index
+            )
+        for path in sp_paths:
+            sp_dirs.setdefault(f"{package_name}.{path.name}", []).append(path)
+        for stem in sm_stems:
+            if f"{package_name}.{stem}" not in sm_names:
+                sm_names.append(f"{package_name}.{stem}")
+    node = {
+        "namespace": namespace,
+        "subpackages": list(sp_dirs),
+        "submodules": sm_names,
+    }
+    return node, [(paths, sp_name) for sp_name, paths in sp_dirs.items()]
+
+
+def build_package_tree(package_dirs, package_name, max_workers=None, index=None):
+    """Build an in-memory index of the whole package tree.
+
+    Every directory is scanned exactly once, as a separate task on a thread
+    pool, so independent subpackages are scanned concurrently.
+
+    Parameters
+    ----------
 
-        s += "\n"
-        package_file = api_dir / f"{package_name}.rst"
-        with open(package_file, "w") as pfile:
-            pfile.write(s)
+    package_dirs: list
+        The directories of the package. A namespace package split across
+        distributions has one directory per distribution.
+    package_name: str
+        The name of the package (e.g. diffpy.pdfmorph).
+    max_workers: int, optional
+        The maximum number of threads used.
+    index: ModuleIndex, optional
+        The module index used to skip private, empty and non-package entries.
 
-        # Recurse on all subpackages
-        for idx, path in enumerate(sp_paths):
-            gen_package_files(path, sp_names[idx])
+    Returns
+    -------
 
-    gen_package_files(base_package_dir, base_package_name)
+    tree: dict
+        The node of each package, keyed by the package's full name.
+    """
+    tree = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {
+            executor.submit(
+                scan_package_node, package_dirs, package_name, index
+            ): package_name
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                tree[name], subpackages = future.result()
+                for sp_paths, sp_name in subpackages:
+                    sp_future = executor.submit(
+                        scan_package_node, sp_paths, sp_name, index
+                    )
+                    pending[sp_future] = sp_name
+
+    if index is not None:
+        prune_package_tree(tree, package_name)
+    return tree
+
+
+def prune_package_tree(tree, package_name):
+    """Remove namespace packages that contain nothing to document."""
+    for name in sorted(tree, key=lambda name: name.count("."), reverse=True):
+        node = tree[name]
+        node["subpackages"] = [sp for sp in node["subpackages"] if sp in tree]
+        if (
+            name != package_name
+            and node["namespace"]
+            and not node["subpackages"]
+            and not node["submodules"]
+        ):
+            del tree[name]
+
+
+def gen_package_files(package_dir, package_name, max_workers=None, index=None):
+    """Generate package files.
+
+    The package tree is built once and every .rst file, including all the
+    toctrees, is rendered from it.
+
+    Parameters
+    ----------
+
+    package_dir: Path or list
+        The package directory (e.g. /src/diffpy/pdfmorph), or a list of the
+        directories of a namespace package split across distributions.
+    package_name: str
+        The name of the package (e.g. diffpy.pdfmorph).
+    max_workers: int, optional
+        The maximum number of threads used.
+    index: ModuleIndex, optional
+        The module index used to skip private, empty and non-package entries.
+
+    Returns
+    -------
+
+    api_files: dict
+        The content of each package file, keyed by file name.
+    """
+    package_dirs = [package_dir] if isinstance(package_dir, Path) else package_dir
+    tree = build_package_tree(package_dirs, package_name, max_workers, index)
+    return {
+        f"{name}.rst": render_package_file(
+            name, node["subpackages"], node["submodules"], node["namespace"]
+        )
+        for name, node in tree.items()
+    }
+
+
+def main(opts, pargs):
+    base_package_name = pargs[0].replace("-", "_")
+    base_package_dirs = [Path(path).resolve() for path in pargs[1].split(os.pathsep)]
+    api_dir = Path(pargs[2]).resolve()
+
+    index = ModuleIndex(get_index_path(api_dir)) if opts.ast else None
+    if opts.trace:
+        enable_tracing(opts.trace)
+
+    # Generate the content of the API directory
+    with span("auto_api.scan", package=base_package_name):
+        api_files = gen_package_files(base_package_dirs, base_package_name, index=index)
+    if index is not None:
+        index.save()
+        print(f"Parsed {index.parsed} of {len(index.used)} modules.")
+
+    # Populate API directory
+    written, removed = write_api_files(api_dir, api_files, opts.incremental)
+    if opts.incremental:
+        print(
+            f"Updated {len(written)} and removed {len(removed)} of "
+            f"{len(api_files)} API files in {api_dir}."
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,385 @@
+"""
+Benchmark the release scripts on synthetic inputs.
+
+Every input is generated in a temporary directory: a large PyPI JSON payload
+served by a local stand-in HTTP server, a deep package tree for auto_api.py,
+thousands of news files and a multi-megabyte CHANGELOG.rst, and dozens of
+workflow templates. Nothing is downloaded and no user cache is touched.
+
+Each benchmark is run several times and the minimum and median wall times
+are reported. Save the results of a commit as a baseline and compare a later
+run against it to spot regressions:
+
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+With --compare, the script exits with status 1 if any benchmark is slower
+than the baseline by more than --threshold. Use --scale to shrink or grow the
+synthetic inputs, e.g. --scale 0.1 for a quick check.
+"""
+
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+WORKFLOWS_DIR = REPO_DIR / ".github" / "workflows"
+
+
+class PyPIStandInHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the synthetic PyPI JSON payload with an ETag."""
+
+    payload = b""
+    etag = ""
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_pypi_server(payload):
+    """Start a stand-in PyPI server in a background thread and return it."""
+    PyPIStandInHandler.payload = payload
+    PyPIStandInHandler.etag = f'"{hashlib.sha256(payload).hexdigest()[:16]}"'
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PyPIStandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_pypi_payload(n_releases):
+    """Return the JSON metadata of a package with many releases and files."""
+    releases = {}
+    for i in range(n_releases):
+        version = f"{i // 100}.{i // 10 % 10}.{i % 10}"
+        files = [
+            {
+                "packagetype": "bdist_wheel",
+                "filename": f"pkg-{version}-cp3{py}-cp3{py}-manylinux_x86_64.whl",
+                "digests": {
+                    "sha256": hashlib.sha256(f"{version}{py}".encode()).hexdigest()
+                },
+                "url": f"https://files.example.org/pkg-{version}-cp3{py}.whl",
+                "size": 123456,
+            }
+            for py in range(10, 14)
+        ]
+        files.append(
+            {
+                "packagetype": "sdist",
+                "filename": f"pkg-{version}.tar.gz",
+                "digests": {"sha256": hashlib.sha256(version.encode()).hexdigest()},
+                "url": f"https://files.example.org/pkg-{version}.tar.gz",
+                "size": 654321,
+            }
+        )
+        releases[version] = files
+    info = {"name": "pkg", "description": "A synthetic package. " * 2000}
+    return json.dumps({"info": info, "releases": releases}).encode()
+
+
+def make_package_tree(root, depth, breadth, n_modules):
+    """Create a package tree with ``breadth`` subpackages per level."""
+
+    def make_package(path, level):
+        path.mkdir(parents=True)
+        (path / "__init__.py").write_text('"""A package."""\n')
+        for i in range(n_modules):
+            (path / f"module_{i}.py").write_text(
+                f'"""Module {i}."""\n\n\ndef function_{i}():\n    return {i}\n'
+            )
+        (path / "_private.py").write_text("x = 1\n")
+        if level < depth:
+            for i in range(breadth):
+                make_package(path / f"sub_{i}", level + 1)
+
+    make_package(root, 1)
+    return root
+
+
+def make_news_files(news_dir, n_files):
+    """Create news files that use several categories each."""
+    news_dir.mkdir(parents=True)
+    template = (REPO_DIR / "news" / "TEMPLATE.rst").read_text()
+    (news_dir / "TEMPLATE.rst").write_text(template)
+    for i in range(n_files):
+        content = template.replace(
+            "* <news item>", f"* Change number {i} of the synthetic release.", 2
+        )
+        (news_dir / f"news-{i}.rst").write_text(content)
+    return sorted(str(path) for path in news_dir.glob("news-*.rst"))
+
+
+def make_changelog(path, n_versions, items_per_version):
+    """Write a CHANGELOG.rst with many release sections, newest first."""
+    lines = [
+        "=============",
+        "Release notes",
+        "=============",
+        "",
+        ".. current developments",
+        "",
+    ]
+    for i in reversed(range(n_versions)):
+        lines += [f"{i // 100}.{i // 10 % 10}.{i % 10}", "=====", "", "**Added:**", ""]
+        lines += [
+            f"* Item {j} of a synthetic release with a reasonably long description."
+            for j in range(items_per_version)
+        ]
+        lines += ["", "**Fixed:**", "", "* A synthetic fix.", ""]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def make_workflow_templates(n_templates, n_params):
+    """Return workflow templates that each use many parameters."""
+    templates = {}
+    for i in range(n_templates):
+        lines = [f"name: Workflow {i}", "", "on:", "  push:", "", "jobs:"]
+        for j in range(n_params):
+            lines += [
+                f"  job-{j}:",
+                f"    uses: scikit-package/release-scripts/.github/workflows/_job-{j}.yml@v0",
+                "    with:",
+                f"      project: {{{{ PROJECT / project-{j} }}}}",
+                "      c_extension: {{ C_EXTENSION / false }}",
+                f"      python_version: {{{{ PYTHON_VERSION_{j % 5} / 3.13 }}}}",
+            ]
+        templates[f"workflow-{i}.yml"] = "\n".join(lines) + "\n"
+    return templates
+
+
+def time_function(function, setup=None, repeat=5):
+    """Return the wall times of ``repeat`` calls of function, in seconds."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def build_benchmarks(work_dir, scale):
+    """Generate the inputs and return a {name: (function, setup)} dictionary."""
+
+    def scaled(n):
+        return max(1, int(n * scale))
+
+    # The modules are imported after the cache and PyPI URL are redirected
+    # to the temporary directory and the stand-in server.
+    os.environ["RELEASE_SCRIPTS_CACHE"] = str(work_dir / "cache")
+    server = start_pypi_server(make_pypi_payload(scaled(3000)))
+    os.environ["PYPI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/pypi"
+    sys.path[:0] = [str(REPO_DIR), str(WORKFLOWS_DIR)]
+
+    import release_pipeline
+
+    import auto_api
+    import cf_release
+    import pypi_client
+    import update_workflow
+
+    update_changelog = release_pipeline.update_changelog
+    get_latest_changelog = release_pipeline.get_latest_changelog
+
+    def reset_pypi_cache():
+        shutil.rmtree(work_dir / "cache", ignore_errors=True)
+        pypi_client._default_client = None
+
+    package_dir = make_package_tree(
+        work_dir / "src" / "pkg", depth=scaled(5), breadth=3, n_modules=scaled(20)
+    )
+    news_files = make_news_files(work_dir / "news", scaled(3000))
+    changelog_source = make_changelog(
+        work_dir / "CHANGELOG.source.rst", scaled(1000), items_per_version=60
+    )
+    changelog_path = work_dir / "CHANGELOG.rst"
+    news_items = update_changelog.collect_news_items(news_files)
+    oldest_tag = "0.0.0"
+    templates = make_workflow_templates(scaled(40), n_params=scaled(50))
+    params = {"PROJECT": "pkg", "C_EXTENSION": "true"}
+
+    def copy_changelog():
+        shutil.copyfile(changelog_source, changelog_path)
+
+    def remove_changelog_index():
+        copy_changelog()
+        index_path = get_latest_changelog.get_index_path(str(changelog_path))
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    def update_all_workflows():
+        for content in templates.values():
+            update_workflow.update_workflow_params(content, params)
+
+    return {
+        "get_package_versions_SHA/cold": (
+            lambda: cf_release.get_package_versions_SHA("pkg"),
+            reset_pypi_cache,
+        ),
+        "get_package_versions_SHA/revalidated": (
+            lambda: cf_release.get_package_versions_SHA("pkg"),
+            None,
+        ),
+        "gen_package_files": (
+            lambda: auto_api.gen_package_files(package_dir, "pkg"),
+            None,
+        ),
+        "extract_news_items": (
+            lambda: update_changelog.collect_news_items(news_files),
+            None,
+        ),
+        "write_merged_file": (
+            lambda: update_changelog.write_merged_file(
+                "9.9.9", news_items, str(changelog_path)
+            ),
+            copy_changelog,
+        ),
+        "get_tag_news_items/cold": (
+            lambda: get_latest_changelog.get_tag_news_items(
+                oldest_tag, str(changelog_path)
+            ),
+            remove_changelog_index,
+        ),
+        "get_tag_news_items/indexed": (
+            lambda: get_latest_changelog.get_tag_news_items(
+                oldest_tag, str(changelog_path)
+            ),
+            None,
+        ),
+        "update_workflow_params": (update_all_workflows, None),
+    }
+
+
+def get_commit():
+    """Return the current commit of the repository, or None outside git."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, scale=1.0, repeat=5):
+    """Run the benchmarks and return the results as a JSON-compatible dictionary."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="release-scripts-bench-") as tmp:
+        benchmarks = build_benchmarks(Path(tmp), scale)
+        for name, (function, setup) in benchmarks.items():
+            if names and not any(name.startswith(n) for n in names):
+                continue
+            # One untimed call warms up imports and caches
+            if setup is not None:
+                setup()
+            function()
+            times = time_function(function, setup, repeat)
+            results[name] = {"min": min(times), "median": statistics.median(times)}
+            print(
+                f"{name:<36} min {min(times):9.4f}s  median {statistics.median(times):9.4f}s"
+            )
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "scale": scale,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare_results(results, baseline, threshold=0.25):
+    """Print the change of each benchmark and return the names of regressions."""
+    if baseline.get("scale") != results["scale"]:
+        print(
+            f"Warning: the baseline was run with --scale {baseline.get('scale')}, "
+            f"this run with --scale {results['scale']}."
+        )
+    print(f"\nCompared with {baseline.get('commit') or 'the baseline'}:")
+    regressions = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<36} (no baseline)")
+            continue
+        before = baseline["results"][name]["min"]
+        change = result["min"] / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<36} {before:9.4f}s -> {result['min']:9.4f}s  {change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the release scripts on synthetic inputs."
+    )
+    parser.add_argument(
+        "names",
+        nargs="*",
+        help="Only run the benchmarks whose name starts with one of these.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Size factor of the synthetic inputs (default: 1.0).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per benchmark (default: 5)."
+    )
+    parser.add_argument("--save", metavar="PATH", help="Save the results as JSON.")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="Compare with results saved by --save."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Slowdown reported as a regression by --compare (default: 0.25).",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names, args.scale, args.repeat)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved the results to {args.save}")
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        if compare_results(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
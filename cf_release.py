@@ -1,20 +1,45 @@
+import json
+import shlex
 import subprocess
-import sys
-from os.path import dirname, exists, join
+from functools import lru_cache, wraps
+from os.path import abspath, dirname, exists, isdir, join
 
-import click
-import requests
-from click import confirm, prompt
+from tracing import enable_tracing, span
 
 """
 This script streamlines the process of updating Python package versions and
 their corresponding SHA256 hash in a meta.yaml file, followed by creating a
 PR into the GitHub feedstock repository.
 
+Before running the script, install the required packages using the following
+command:
+
+    conda install click requests packaging
+
 How to use:
 
 python /path/.../cf_release.py
 
+The same steps are available as non-interactive commands:
+
+python /path/.../cf_release.py versions diffpy.pdfgui [--cached]
+python /path/.../cf_release.py bump diffpy.pdfgui [--version 1.2.0] [--dry-run]
+python /path/.../cf_release.py pr diffpy.pdfgui [--version 1.2.0] --release-type release
+python /path/.../cf_release.py batch packages.txt --release-type release
+
+`versions` lists the latest PyPI versions and their SHA256, `bump` only updates
+meta.yaml, `pr` also commits, pushes and creates the PR, and `batch` bumps many
+feedstocks listed one package per line in a manifest file (optionally pinned as
+<package>==<version>). Add --verify to download each selected sdist and check
+it against the SHA256 reported by PyPI before meta.yaml is updated, and
+--report report.json to save the wall time and output of every git/gh command.
+
+`versions --cached` reads a package already in the PyPI cache without asking
+PyPI whether it changed, which also works offline. click, requests and the
+other helper modules are imported when they are first needed, so such quick
+commands start fast. run_cli() runs a command in-process without click's standalone
+mode and returns its result, e.g. run_cli(["versions", "diffpy.pdfgui"]).
+
 Workflow:
 
 - The user is prompted to enter the name of a PyPI package.
@@ -24,6 +49,14 @@ Workflow:
 - Fetch the user's GitHub username using the GitHub CLI for authentication
 - Update the meta.yaml file with the new version and SHA256
 - Commit these changes, pushes them to GitHub, and creates a PR
+
+Batch workflow:
+
+- Read the package names (and optional pinned versions) from the manifest.
+- Fetch the PyPI versions and SHA256 hashes for all packages concurrently.
+- Fetch the user's GitHub username once.
+- Update meta.yaml and create a PR for each feedstock on a bounded worker pool.
+- Print a per-package success/failure summary table.
 """
 
 """
@@ -36,15 +69,19 @@ def format_sha(sha):
     return sha[:4] + "..." + sha[-4:]
 
 
-def run_command(command, cwd=None):
-    """Run a shell command in the specified directory."""
-    subprocess.run(
-        command,
-        check=True,
-        shell=True,
-        text=True,
-        cwd=cwd,
-    )
+def run_command(command, cwd=None, report=None, retries=0):
+    """
+    Run a command in the specified directory without a shell.
+
+    The command is an argv list; a string is split with shlex. The result is
+    recorded in ``report`` when one is given.
+    """
+    from command_runner import CommandReport
+
+    if isinstance(command, str):
+        command = shlex.split(command)
+    report = report if report is not None else CommandReport()
+    return report.run(command, cwd=cwd, retries=retries)
 
 
 """
@@ -52,20 +89,18 @@ Core Functionalities - fetch info from PyPI, update meta.yaml and create PR
 """
 
 
-def get_package_versions_SHA(package_name, count=5):
-    """Fetch the latest versions of the package and their SHA256 from PyPI."""
-    response = requests.get(f"https://pypi.org/pypi/{package_name}/json")
-    if response.status_code == 200:
-        data = response.json()
-        versions = sorted(data["releases"].keys(), reverse=True)[:count]
-        version_info = {}
-        for version in versions:
-            files = data["releases"][version]
-            for file in files:
-                if file["packagetype"] == "sdist":
-                    version_info[version] = file["digests"]["sha256"]
-                    break
-        return version_info
+def get_package_versions_SHA(package_name, count=5, cached=False):
+    """
+    Fetch the latest versions of the package and their SHA256 from PyPI.
+
+    The versions are ordered from newest to oldest following PEP 440. With
+    ``cached``, PyPI metadata already in the cache is used without revalidation.
+    """
+    from pypi_client import get_default_client
+
+    releases = get_default_client().get_latest_sdists(package_name, count, cached)
+    if releases is not None:
+        return {release["version"]: release["sha256"] for release in releases}
     else:
         error_message = (
             f"No matching package has been found for {package_name}. "
@@ -76,10 +111,29 @@ def get_package_versions_SHA(package_name, count=5):
         raise ValueError(error_message)
 
 
-def get_feedstock_and_meta_file_path(package_name):
-    release_scripts_dir_path = dirname(sys.argv[0])
+def get_feedstock_and_meta_file_path(package_name, username=None):
+    """
+    Return the feedstock directory and its meta.yaml.
+
+    A <package_name>-feedstock directory next to release-scripts is used when
+    it exists. Otherwise the feedstock is cloned on demand into the managed
+    workspace (see workspace.py), using ``username`` for the origin remote.
+    """
+    release_scripts_dir_path = dirname(abspath(__file__))
     dev_dir_path = dirname(release_scripts_dir_path)
     feedstock_dir_path = join(dev_dir_path, f"{package_name}-feedstock")
+    if not isdir(feedstock_dir_path):
+        from workspace import get_feedstock
+
+        try:
+            feedstock_dir_path = str(
+                get_feedstock(package_name, username or get_github_username())
+            )
+        except RuntimeError as e:
+            raise FileNotFoundError(
+                f"{package_name}-feedstock was not found in the dev folder and could "
+                f"not be cloned into the workspace: {e}"
+            )
     meta_file_path = join(feedstock_dir_path, "recipe", "meta.yaml")
 
     # Check if the meta file exists to ensure the path is correct
@@ -94,68 +148,152 @@ def get_feedstock_and_meta_file_path(package_name):
     return feedstock_dir_path, meta_file_path
 
 
-def update_meta_yaml(meta_file_path, new_version, new_sha256):
+def select_version(package_name, version, pypi_version_info):
+    """
+    Return the version to release and its SHA256.
+
+    The latest version is used if ``version`` is None.
+    """
+    if version is None:
+        version = next(iter(pypi_version_info))
+    elif version not in pypi_version_info:
+        raise ValueError(
+            f"{version} is not available in the latest versions of {package_name}."
+        )
+    return version, pypi_version_info[version]
+
+
+def update_meta_yaml(meta_file_path, new_version, new_sha256, dry_run=False):
     """
     Update the meta.yaml file with the new version and SHA256 hash
     before making a PR to the feedstock repository.
+
+    Return a unified diff of the change.
     """
-    with open(meta_file_path, "r") as file:
-        lines = file.readlines()
+    from recipe_editor import edit_recipe
 
-    with open(meta_file_path, "w") as file:
-        for line in lines:
-            if "{%- set version =" in line:
-                line = f'{{%- set version = "{new_version}" -%}}\n'
-            elif "{% set version =" in line:
-                line = f'{{% set version = "{new_version}" %}}\n'
-            elif "sha256:" in line:
-                line = f"  sha256: {new_sha256}\n"
-            file.write(line)
+    return edit_recipe(meta_file_path, new_version, new_sha256, dry_run=dry_run)
 
 
 def run_gh_shell_command(
-    cwd, meta_file_path, version, SHA256, username, package_name, release_type
+    cwd,
+    meta_file_path,
+    version,
+    SHA256,
+    username,
+    package_name,
+    release_type,
+    report=None,
 ):
     """
     Create a PR from a branch name of <new_version>
     to the main branch of the feedstock repository.
+
+    If ``username`` is None, it is fetched with the GitHub CLI while main is
+    being updated. Return the CommandReport holding every command run.
+
+    The feedstock state (see feedstock_state.py) is used to skip the release
+    when meta.yaml is already at the version or a PR is already open for it,
+    and to skip pulling main when it already matches upstream.
     """
-    # Check out main and pull the latest changes
-    run_command("git checkout main", cwd=cwd)
-    run_command("git pull upstream main", cwd=cwd)
+    from command_runner import CommandReport, run_concurrently
+    from feedstock_state import FeedstockState
+
+    report = report if report is not None else CommandReport(package_name)
+    state = FeedstockState(cwd, package_name, report)
+
+    # A single ref check tells whether upstream main moved since the last run
+    upstream_head = state.fetch_upstream_head()
+    if state.is_recipe_current(upstream_head, version, SHA256):
+        report.skip(f"meta.yaml is already at {version}.")
+        return report
+
+    def update_main():
+        # Check out main and pull the latest changes unless it is up to date
+        run_command(["git", "checkout", "main"], cwd=cwd, report=report)
+        if state.get_local_head("main") != upstream_head:
+            run_command(
+                ["git", "pull", "upstream", "main"], cwd=cwd, report=report, retries=2
+            )
+        return state.record_recipe(state.get_local_head("main"), meta_file_path)
+
+    if username is None:
+        recipe, username = run_concurrently(
+            update_main, lambda: get_github_username(report)
+        )
+    else:
+        recipe = update_main()
+
+    if recipe == (version, SHA256):
+        state.save()
+        report.skip(f"meta.yaml is already at {version}.")
+        return report
+
+    conflict = state.get_branch_conflict(version)
+    state.save()
+    if conflict is not None:
+        kind, message = conflict
+        if kind == "skip":
+            report.skip(message)
+            return report
+        raise RuntimeError(message)
 
     # Create and switch to a new branch named after the new version
-    run_command(f"git checkout -b {version}", cwd=cwd)
+    run_command(["git", "checkout", "-b", version], cwd=cwd, report=report)
 
     # Update the meta.yaml file
     update_meta_yaml(meta_file_path, version, SHA256)
 
     # Add the updated meta.yaml file to the staging area
-    run_command("git add recipe/meta.yaml", cwd=cwd)
+    run_command(["git", "add", "recipe/meta.yaml"], cwd=cwd, report=report)
 
     # Commit the changes
-    run_command(f'git commit -m "Update conda package to {version}"', cwd=cwd)
+    run_command(
+        ["git", "commit", "-m", f"Update conda package to {version}"],
+        cwd=cwd,
+        report=report,
+    )
 
     # Push the new branch to your origin repository
-    run_command(f"git push origin {version}", cwd=cwd)
+    run_command(["git", "push", "origin", version], cwd=cwd, report=report, retries=2)
 
     # Set the branch
     branch = "main" if release_type == "release" else "rc"
 
     run_command(
-        f"gh repo set-default conda-forge/{package_name}-feedstock --branch {branch}",
+        [
+            "gh",
+            "repo",
+            "set-default",
+            f"conda-forge/{package_name}-feedstock",
+            "--branch",
+            branch,
+        ],
         cwd=cwd,
+        report=report,
     )
 
     # Create a pull request using GitHub CLI
-    pr_command = (
-        f"gh pr create --base main --head {username}:{version} "
-        f"--title 'Update meta.yaml to {version}' "
-        f"--body 'Updated meta.yaml to version {version} with SHA value of {SHA256}'"
-    )
+    pr_command = [
+        "gh",
+        "pr",
+        "create",
+        "--base",
+        "main",
+        "--head",
+        f"{username}:{version}",
+        "--title",
+        f"Update meta.yaml to {version}",
+        "--body",
+        f"Updated meta.yaml to version {version} with SHA value of {SHA256}",
+    ]
 
     # Run the PR create command in the appropriate directory
-    run_command(pr_command, cwd=cwd)
+    result = run_command(pr_command, cwd=cwd, report=report)
+
+    state.record_pull_request(version, result["stdout"].strip())
+    state.save()
+    return report
 
 
 """
@@ -164,6 +302,8 @@ User Prompts
 
 
 def prompt_is_latest_version_used(pypi_version_info):
+    from click import confirm
+
     latest_version = next(iter(pypi_version_info))
     use_latest_version = confirm(
         f"\nQ2. Would you like to proceed with the latest version {latest_version}?",
@@ -187,13 +327,13 @@ GitHub Integration
 """
 
 
-def get_github_username():
+def get_github_username(report=None):
     """Get the GitHub username using the GitHub CLI."""
     try:
-        username = subprocess.check_output(
-            ["gh", "api", "user", "--jq", ".login"], text=True
-        ).strip()
-        return username
+        result = run_command(
+            ["gh", "api", "user", "--jq", ".login"], report=report, retries=2
+        )
+        return result["stdout"].strip()
     except subprocess.CalledProcessError:
         raise RuntimeError(
             "Could not retrieve GitHub username using GitHub CLI. "
@@ -201,18 +341,362 @@ def get_github_username():
         )
 
 
-@click.command()
-@click.option(
-    "--choice",
-    type=click.Choice(["1", "2"]),
-    prompt="\nQ. Would you like to (1) release or (2) pre-release on conda-forge?",
-)
-def prompt_release_type(choice):
+def prompt_release_type():
+    from click import Choice, prompt
+
+    choice = prompt(
+        "\nQ. Would you like to (1) release or (2) pre-release on conda-forge?",
+        type=Choice(["1", "2"]),
+    )
     release_type = "release" if choice == "1" else "pre-release"
     print("You've selected:", release_type)
     return release_type
 
 
+"""
+Batch Mode
+"""
+
+
+def read_batch_manifest(manifest_path):
+    """
+    Read the package names to release from a manifest file.
+
+    Each non-empty line holds a PyPI package name, optionally pinned to a
+    version as <package>==<version>. Lines starting with '#' are ignored.
+    Return a list of (package_name, version) tuples where version is None
+    when the latest PyPI version should be used. Raise ValueError if a
+    package is listed twice, since each feedstock can only be released once
+    at a time.
+    """
+    packages = []
+    line_numbers = {}
+    with open(manifest_path, "r") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            package_name, _, version = line.partition("==")
+            package_name = package_name.strip()
+            if package_name in line_numbers:
+                raise ValueError(
+                    f"{package_name} is listed twice in {manifest_path} (lines "
+                    f"{line_numbers[package_name]} and {line_number})."
+                )
+            line_numbers[package_name] = line_number
+            packages.append((package_name, version.strip() or None))
+    return packages
+
+
+def release_feedstock(
+    package_name,
+    version,
+    pypi_version_info,
+    username,
+    release_type,
+    verify=False,
+    report=None,
+):
+    """Update meta.yaml and create a PR for a single feedstock."""
+    fd_stock_dir_path, meta_file_path = get_feedstock_and_meta_file_path(
+        package_name, username
+    )
+    version, SHA256 = select_version(package_name, version, pypi_version_info)
+    with span("feedstock.release", package=package_name, version=version):
+        if verify:
+            from sdist_verify import verify_package_version
+
+            verify_package_version(package_name, version)
+        run_gh_shell_command(
+            fd_stock_dir_path,
+            meta_file_path,
+            version,
+            SHA256,
+            username,
+            package_name,
+            release_type,
+            report=report,
+        )
+    return version, SHA256
+
+
+def format_failure(error):
+    """Return a one-line description of a failed release step."""
+    if isinstance(error, subprocess.CalledProcessError) and error.stderr:
+        # git reports the cause first and follow-up errors after it
+        lines = error.stderr.strip().splitlines()
+        causes = [line for line in lines if line.startswith(("fatal:", "error:"))]
+        return f"{error} {(causes or lines[-1:])[0]}"
+    return str(error)
+
+
+def run_batch_release(
+    packages, release_type, max_workers=4, verify=False, reports=None
+):
+    """
+    Release many feedstocks without prompting the user.
+
+    The PyPI lookups run concurrently for all packages. Each feedstock is then
+    updated on a pool of at most ``max_workers`` threads, since every feedstock
+    lives in its own directory. Return a dictionary mapping each package name to
+    a (status, detail) tuple. If ``verify`` is True, each selected sdist is
+    downloaded and checked against its PyPI SHA256 before meta.yaml is updated.
+    The git/gh commands run for each package are recorded in ``reports``.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from command_runner import CommandReport
+
+    results = {}
+    if reports is None:
+        reports = {}
+    for package_name, _ in packages:
+        reports[package_name] = CommandReport(package_name)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        lookups = {
+            package_name: executor.submit(get_package_versions_SHA, package_name)
+            for package_name, _ in packages
+        }
+        version_infos = {}
+        for package_name, future in lookups.items():
+            try:
+                version_infos[package_name] = future.result()
+            except Exception as e:
+                results[package_name] = ("failed", str(e))
+
+        username = get_github_username()
+
+        releases = {
+            package_name: executor.submit(
+                release_feedstock,
+                package_name,
+                version,
+                version_infos[package_name],
+                username,
+                release_type,
+                verify,
+                reports[package_name],
+            )
+            for package_name, version in packages
+            if package_name in version_infos
+        }
+        for package_name, future in releases.items():
+            try:
+                version, SHA256 = future.result()
+                report = reports[package_name]
+                if report.skipped:
+                    results[package_name] = ("skipped", report.skipped)
+                    continue
+                results[package_name] = (
+                    "success",
+                    f"{version} (SHA256 {format_sha(SHA256)}) in "
+                    f"{report.total_duration:.1f}s",
+                )
+            except Exception as e:
+                results[package_name] = ("failed", format_failure(e))
+
+    return {package_name: results[package_name] for package_name, _ in packages}
+
+
+def print_batch_summary(results):
+    """Print a per-package success/failure table."""
+    name_width = max([len("Package")] + [len(name) for name in results])
+    status_width = max(
+        [len("Status")] + [len(status) for status, _ in results.values()]
+    )
+    print(f"\n{'Package':<{name_width}}  {'Status':<{status_width}}  Detail")
+    print(f"{'-' * name_width}  {'-' * status_width}  {'-' * 6}")
+    for package_name, (status, detail) in results.items():
+        print(f"{package_name:<{name_width}}  {status:<{status_width}}  {detail}")
+
+
+def write_reports(report_path, reports):
+    """Save the commands run for each package to a JSON file."""
+    with open(report_path, "w") as file:
+        json.dump([report.to_dict() for report in reports], file, indent=2)
+
+
+"""
+Command Line Interface
+"""
+
+
+@lru_cache(maxsize=None)
+def create_cli():
+    """Build the click command group of cf_release.py."""
+    import click
+
+    def handle_errors(function):
+        # Show the expected failures as one-line errors instead of tracebacks
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            except (click.exceptions.Exit, click.Abort):
+                # Both derive from RuntimeError but are handled by click
+                raise
+            except (ValueError, FileNotFoundError, RuntimeError) as e:
+                raise click.ClickException(str(e))
+            except subprocess.CalledProcessError as e:
+                raise click.ClickException(format_failure(e))
+
+        return wrapper
+
+    version_option = click.option(
+        "--version", "version", help="Version to use (default: the latest)."
+    )
+    release_type_option = click.option(
+        "--release-type",
+        type=click.Choice(["release", "pre-release"]),
+        default="release",
+        show_default=True,
+    )
+    verify_option = click.option(
+        "--verify",
+        is_flag=True,
+        help="Download the sdist and check it against the SHA256 reported by PyPI.",
+    )
+    report_option = click.option(
+        "--report",
+        "report_path",
+        type=click.Path(dir_okay=False, writable=True),
+        help="Write the wall time and output of every git/gh command to a JSON file.",
+    )
+
+    @click.group(invoke_without_command=True)
+    @click.option(
+        "--trace",
+        "trace_path",
+        type=click.Path(dir_okay=False, writable=True),
+        help="Record timing spans to a file (see tracing.py).",
+    )
+    @click.pass_context
+    def cli(ctx, trace_path):
+        """
+        Update conda-forge feedstocks to new PyPI releases.
+
+        Run without a command to be prompted for every step.
+        """
+        if trace_path:
+            enable_tracing(trace_path)
+        if ctx.invoked_subcommand is None:
+            handle_errors(main)()
+
+    @cli.command()
+    @click.argument("package_name")
+    @click.option("--count", type=click.IntRange(min=1), default=5, show_default=True)
+    @click.option(
+        "--cached",
+        is_flag=True,
+        help="Use the cached PyPI metadata without checking PyPI for changes.",
+    )
+    @handle_errors
+    def versions(package_name, count, cached):
+        """List the latest PyPI versions of a package and their SHA256."""
+        pypi_version_info = get_package_versions_SHA(package_name, count, cached)
+        for version, sha in pypi_version_info.items():
+            click.echo(f"{version} {sha}")
+        return pypi_version_info
+
+    @cli.command()
+    @click.argument("package_name")
+    @version_option
+    @verify_option
+    @click.option(
+        "--dry-run", is_flag=True, help="Print the diff without changing meta.yaml."
+    )
+    @handle_errors
+    def bump(package_name, version, verify, dry_run):
+        """Update the version and SHA256 in the feedstock's meta.yaml."""
+        _, meta_file_path = get_feedstock_and_meta_file_path(package_name)
+        version, SHA256 = select_version(
+            package_name, version, get_package_versions_SHA(package_name)
+        )
+        if verify:
+            from sdist_verify import verify_package_version
+
+            verify_package_version(package_name, version)
+        diff = update_meta_yaml(meta_file_path, version, SHA256, dry_run=dry_run)
+        click.echo(diff or f"meta.yaml is already at {version}.", nl=not diff)
+        return diff
+
+    @cli.command()
+    @click.argument("package_name")
+    @version_option
+    @release_type_option
+    @verify_option
+    @report_option
+    @handle_errors
+    def pr(package_name, version, release_type, verify, report_path):
+        """Update meta.yaml and create a PR into the feedstock repository."""
+        from command_runner import CommandReport
+
+        report = CommandReport(package_name)
+        try:
+            version, SHA256 = release_feedstock(
+                package_name,
+                version,
+                get_package_versions_SHA(package_name),
+                None,
+                release_type,
+                verify,
+                report,
+            )
+        finally:
+            report.print_summary()
+            if report_path:
+                write_reports(report_path, [report])
+        return version, SHA256
+
+    @cli.command()
+    @click.argument("manifest_path", type=click.Path(exists=True, dir_okay=False))
+    @release_type_option
+    @click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        default=4,
+        show_default=True,
+        help="Maximum number of feedstocks processed at the same time.",
+    )
+    @verify_option
+    @report_option
+    @handle_errors
+    def batch(manifest_path, release_type, workers, verify, report_path):
+        """
+        Update every feedstock listed in a manifest file.
+
+        The manifest lists one PyPI package per line, optionally as
+        <package>==<version>.
+        """
+        packages = read_batch_manifest(manifest_path)
+        if not packages:
+            raise click.UsageError(f"No packages found in {manifest_path}.")
+        reports = {}
+        results = run_batch_release(
+            packages, release_type, max_workers=workers, verify=verify, reports=reports
+        )
+        print_batch_summary(results)
+        if report_path:
+            write_reports(report_path, reports.values())
+        if any(status == "failed" for status, _ in results.values()):
+            raise click.exceptions.Exit(1)
+        return results
+
+    return cli
+
+
+def run_cli(args=None):
+    """
+    Run a cf_release.py command and return its result.
+
+    click's standalone mode is off, so usage errors are raised as
+    click.ClickException instead of exiting the interpreter, and a command
+    that exits with a status, such as `batch` when a release failed, returns
+    that status.
+    """
+    return create_cli().main(args, prog_name="cf_release.py", standalone_mode=False)
+
+
 """
 Main Entry Point
 """
@@ -220,6 +704,8 @@ Main Entry Point
 
 def main():
     release_type = prompt_release_type()
+    from click import prompt
+
     package_name = prompt(
         "Q1. Please enter the PyPI package name Ex) diffpy.pdfgui", type=str
     )
@@ -255,20 +741,26 @@ def main():
         "\nWe will now update the meta.yaml file and create a PR into the feedstock repository."
     )
 
-    # Get the GitHub username using the GitHub CLI
-    username = get_github_username()
-
-    # Run the shell command to update the .yml file and create a PR
-    run_gh_shell_command(
-        fd_stock_dir_path,
-        meta_file_path,
-        new_version,
-        SHA256,
-        username,
-        package_name,
-        release_type,
-    )
+    # Run the git/gh commands to update the .yml file and create a PR.
+    # The GitHub username is fetched with the GitHub CLI while main is pulled.
+    from command_runner import CommandReport
+
+    report = CommandReport(package_name)
+    try:
+        run_gh_shell_command(
+            fd_stock_dir_path,
+            meta_file_path,
+            new_version,
+            SHA256,
+            None,
+            package_name,
+            release_type,
+            report,
+        )
+    finally:
+        report.print_summary()
 
 
 if __name__ == "__main__":
-    main()
+    # Standalone mode shows errors and exits with the status of the command
+    create_cli().main(prog_name="cf_release.py")
@@ -0,0 +1,137 @@
+"""
+Run git and gh commands for the release scripts without a shell.
+
+Commands are given as argv lists and executed directly. The wall time,
+return code and output of every command are recorded in a CommandReport so
+that a release can be inspected afterwards, and commands that talk to the
+network can be retried.
+"""
+
+import json
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import span
+
+
+def run_argv(argv, cwd=None, retries=0, retry_delay=2.0, timeout=None):
+    """
+    Run a command and return a dictionary describing the last attempt.
+
+    The command is retried up to ``retries`` times, waiting ``retry_delay``
+    seconds before the first retry and doubling the delay afterwards.
+    """
+    start = time.perf_counter()
+    with span("command", argv=shlex.join(argv), cwd=str(cwd or "")) as s:
+        returncode, stdout, stderr, attempts = run_with_retries(
+            argv, cwd, retries, retry_delay, timeout
+        )
+        s.set(returncode=returncode, attempts=attempts)
+    return {
+        "argv": list(argv),
+        "cwd": str(cwd) if cwd is not None else None,
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "duration": time.perf_counter() - start,
+        "attempts": attempts,
+    }
+
+
+def run_with_retries(argv, cwd, retries, retry_delay, timeout):
+    """Run a command until it succeeds or the retries are used up."""
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            completed = subprocess.run(
+                argv, cwd=cwd, capture_output=True, text=True, timeout=timeout
+            )
+            returncode, stdout, stderr = (
+                completed.returncode,
+                completed.stdout,
+                completed.stderr,
+            )
+        except subprocess.TimeoutExpired as e:
+            returncode, stdout, stderr = None, e.stdout or "", f"Timed out: {e}"
+        if returncode == 0 or attempts > retries:
+            break
+        time.sleep(retry_delay * 2 ** (attempts - 1))
+    return returncode, stdout, stderr, attempts
+
+
+def run_concurrently(*steps):
+    """Run independent zero-argument callables in parallel and return their results."""
+    with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+        futures = [executor.submit(step) for step in steps]
+        return [future.result() for future in futures]
+
+
+class CommandReport:
+    """Collect the results of the commands run for one release."""
+
+    def __init__(self, name=""):
+        self.name = name
+        self.results = []
+        self.skipped = None
+        self._lock = threading.Lock()
+
+    def run(self, argv, cwd=None, retries=0, timeout=None, check=True):
+        """
+        Run a command, record its result and return it.
+
+        If ``check`` is True and the command still fails after all retries,
+        raise subprocess.CalledProcessError carrying the captured output.
+        """
+        result = run_argv(argv, cwd=cwd, retries=retries, timeout=timeout)
+        with self._lock:
+            self.results.append(result)
+        if check and result["returncode"] != 0:
+            raise subprocess.CalledProcessError(
+                result["returncode"] if result["returncode"] is not None else -1,
+                argv,
+                output=result["stdout"],
+                stderr=result["stderr"],
+            )
+        return result
+
+    def skip(self, reason):
+        """Record that the release was skipped because there is nothing to do."""
+        self.skipped = reason
+
+    @property
+    def total_duration(self):
+        return sum(result["duration"] for result in self.results)
+
+    def print_summary(self):
+        """Print the wall time and return code of every command and any errors."""
+        print(f"\nCommands run for {self.name}:" if self.name else "\nCommands run:")
+        for result in self.results:
+            status = "ok" if result["returncode"] == 0 else "FAILED"
+            retried = (
+                f", {result['attempts']} attempts" if result["attempts"] > 1 else ""
+            )
+            print(
+                f" - {result['duration']:6.2f}s {status}{retried}: "
+                f"{shlex.join(result['argv'])}"
+            )
+            if result["returncode"] != 0 and result["stderr"].strip():
+                for line in result["stderr"].strip().splitlines():
+                    print(f"     {line}")
+        if self.skipped:
+            print(f"Skipped: {self.skipped}")
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "total_duration": self.total_duration,
+            "skipped": self.skipped,
+            "commands": self.results,
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
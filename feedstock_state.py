@@ -0,0 +1,171 @@
+"""
+Remember the state of each local feedstock clone between releases.
+
+For every feedstock a small JSON record is kept in the release-scripts cache
+(see http_cache.py). It holds:
+
+- the upstream main HEAD that the local main was last synced to,
+- the recipe version and sha256 found at that HEAD,
+- the version branches on origin and the open PRs of the feedstock.
+
+A release first asks upstream for its main HEAD with `git ls-remote`, which
+only transfers refs. When the HEAD is unchanged and the recorded recipe is
+already at the requested version, the release is skipped without touching the
+clone. Otherwise main is only pulled when the local main differs from the
+upstream HEAD, and a version branch that already exists on origin is found
+before anything is committed.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from fsutils import atomic_write
+from http_cache import DEFAULT_CACHE_DIR
+from recipe_editor import read_recipe
+
+STATE_DIR = DEFAULT_CACHE_DIR / "feedstocks"
+
+
+def get_state_path(feedstock_dir, state_dir=None):
+    """Return the state file of a feedstock clone, keyed by its absolute path."""
+    feedstock_dir = os.path.abspath(feedstock_dir)
+    digest = hashlib.sha256(feedstock_dir.encode("utf-8")).hexdigest()[:12]
+    return (state_dir or STATE_DIR) / f"{os.path.basename(feedstock_dir)}-{digest}.json"
+
+
+class FeedstockState:
+    """The recorded state of one feedstock clone."""
+
+    def __init__(self, feedstock_dir, package_name, report, state_dir=None):
+        self.feedstock_dir = feedstock_dir
+        self.package_name = package_name
+        self.report = report
+        self.path = get_state_path(feedstock_dir, state_dir)
+        try:
+            with open(self.path, "r") as file:
+                self.record = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.record = {}
+
+    def git(self, *args, retries=0, check=True):
+        result = self.report.run(
+            ["git", *args], cwd=self.feedstock_dir, retries=retries, check=check
+        )
+        return result["stdout"].strip()
+
+    def fetch_upstream_head(self):
+        """Return the commit of main on upstream without fetching any object."""
+        output = self.git("ls-remote", "upstream", "refs/heads/main", retries=2)
+        if not output:
+            raise RuntimeError(
+                f"main was not found on the upstream remote of {self.feedstock_dir}."
+            )
+        return output.split()[0]
+
+    def get_local_head(self, branch="main"):
+        """Return the commit of a local branch, or None if it does not exist."""
+        return (
+            self.git(
+                "rev-parse", "--verify", "--quiet", f"refs/heads/{branch}", check=False
+            )
+            or None
+        )
+
+    def is_recipe_current(self, upstream_head, version, sha256):
+        """Return True if the recipe recorded at upstream_head is already bumped."""
+        return (
+            self.record.get("upstream_head") == upstream_head
+            and self.record.get("recipe_version") == version
+            and self.record.get("recipe_sha256") == sha256
+        )
+
+    def record_recipe(self, head, meta_file_path):
+        """Record the recipe version and sha256 of main synced to head."""
+        version, sha256 = read_recipe(meta_file_path)
+        self.record.update(
+            upstream_head=head, recipe_version=version, recipe_sha256=sha256
+        )
+        return version, sha256
+
+    def fetch_branches(self):
+        """Return the version branches on origin and the local branches."""
+        output = self.git("ls-remote", "--heads", "origin", retries=2)
+        remote = [
+            line.split("\t", 1)[1].removeprefix("refs/heads/")
+            for line in output.splitlines()
+            if "\t" in line
+        ]
+        local = self.git(
+            "for-each-ref", "--format=%(refname:short)", "refs/heads"
+        ).splitlines()
+        self.record["branches"] = sorted(remote)
+        return remote, local
+
+    def fetch_open_prs(self, branch):
+        """Return the open PRs of the feedstock whose head is branch."""
+        result = self.report.run(
+            [
+                "gh",
+                "pr",
+                "list",
+                "--repo",
+                f"conda-forge/{self.package_name}-feedstock",
+                "--head",
+                branch,
+                "--state",
+                "open",
+                "--json",
+                "number,url,headRefName",
+            ],
+            cwd=self.feedstock_dir,
+            retries=2,
+        )
+        prs = json.loads(result["stdout"] or "[]")
+        open_prs = [
+            pr for pr in self.record.get("open_prs", []) if pr["head"] != branch
+        ]
+        open_prs += [
+            {"number": pr["number"], "url": pr["url"], "head": pr["headRefName"]}
+            for pr in prs
+        ]
+        self.record["open_prs"] = open_prs
+        return prs
+
+    def get_branch_conflict(self, version):
+        """
+        Return why a version branch cannot be created, or None.
+
+        An open PR from the version branch means the bump was already
+        proposed, so the release is skipped. A branch without an open PR is
+        reported as an error by the caller.
+        """
+        remote, local = self.fetch_branches()
+        if version in remote:
+            prs = self.fetch_open_prs(version)
+            if prs:
+                return "skip", f"PR {prs[0]['url']} is already open for {version}."
+            return "error", f"Branch {version} already exists on origin."
+        if version in local:
+            return "error", f"Branch {version} already exists in {self.feedstock_dir}."
+        return None
+
+    def record_pull_request(self, branch, url):
+        """Record the branch pushed to origin and the PR opened from it."""
+        self.record["branches"] = sorted(
+            set(self.record.get("branches", [])) | {branch}
+        )
+        number = url.rstrip("/").rsplit("/", 1)[-1]
+        self.record.setdefault("open_prs", []).append(
+            {
+                "number": int(number) if number.isdigit() else None,
+                "url": url,
+                "head": branch,
+            }
+        )
+
+    def save(self):
+        self.record["updated"] = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path, json.dumps(self.record, indent=2))
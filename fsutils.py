@@ -0,0 +1,42 @@
+"""File system helpers shared by the release scripts."""
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# The umask is process-wide, so it is read once at import rather than swapped
+# while other threads may be creating files.
+UMASK = _get_umask()
+
+
+def atomic_write(path, data, encoding="utf-8"):
+    """
+    Write data to path through a temporary file and an atomic rename.
+
+    ``data`` may be str or bytes. The permissions of an existing file are
+    kept, so readers never see a half-written file and the mode is unchanged.
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,162 @@
+"""
+Shared HTTP helpers for the release scripts.
+
+- create_session() returns a requests session with a connection pool and
+  automatic retries with exponential backoff.
+- DiskCache stores response bodies on disk together with their ETag so that
+  repeated runs can revalidate with If-None-Match instead of downloading the
+  same payload again.
+
+The cache lives in ~/.cache/release-scripts by default. Set the environment
+variable RELEASE_SCRIPTS_CACHE to use a different directory.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from fsutils import atomic_write
+from tracing import span
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("RELEASE_SCRIPTS_CACHE", Path.home() / ".cache" / "release-scripts")
+)
+
+
+def create_session(pool_size=10, retries=3, backoff_factor=0.5):
+    """Create a requests session with a connection pool and retries."""
+    # requests is imported here so that modules which only read the cache
+    # do not pay for importing it.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DiskCache:
+    """
+    An on-disk cache of HTTP response bodies keyed by URL.
+
+    Each entry is stored as a <digest>.body file holding the raw payload and a
+    <digest>.json file holding the URL, ETag and fetch time. Entries younger
+    than ``ttl`` seconds are served without touching the network. Once the
+    cache grows beyond ``max_bytes``, the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, cache_dir=None, ttl=3600, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR / "http")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _paths(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return (
+            self.cache_dir / f"{digest}.json",
+            self.cache_dir / f"{digest}.body",
+        )
+
+    def get(self, key):
+        """Return the metadata of a cached entry, or None if it is missing."""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as file:
+                meta = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not body_path.exists():
+            return None
+        meta["body_path"] = body_path
+        return meta
+
+    def is_fresh(self, meta):
+        """Return True if the entry can be used without revalidation."""
+        return time.time() - meta["fetched_at"] < self.ttl
+
+    def read(self, meta):
+        """Return the cached body and mark the entry as recently used."""
+        body_path = meta["body_path"]
+        os.utime(body_path)
+        with open(body_path, "rb") as file:
+            return file.read()
+
+    def store(self, key, body, etag=None):
+        """Store a response body and its ETag, then enforce the size limit."""
+        meta_path, body_path = self._paths(key)
+        meta = {"key": key, "etag": etag, "fetched_at": time.time()}
+        with self._lock:
+            atomic_write(body_path, body)
+            atomic_write(meta_path, json.dumps(meta).encode())
+            self.evict()
+        meta["body_path"] = body_path
+        return meta
+
+    def refresh(self, meta):
+        """Reset the fetch time of an entry after a 304 Not Modified."""
+        meta_path, _ = self._paths(meta["key"])
+        stored = {k: meta[k] for k in ("key", "etag")}
+        stored["fetched_at"] = time.time()
+        atomic_write(meta_path, json.dumps(stored).encode())
+        meta["fetched_at"] = stored["fetched_at"]
+        return meta
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        bodies = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".body"):
+                stat = entry.stat()
+                bodies.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                total += stat.st_size
+        bodies.sort()
+        for _, size, body_path in bodies:
+            if total <= self.max_bytes:
+                break
+            body_path.unlink(missing_ok=True)
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+
+
+def cached_get(session, cache, url, timeout=10, force_revalidate=False):
+    """
+    Fetch url through the cache and return its metadata entry.
+
+    Fresh entries are returned directly. Stale entries are revalidated with
+    If-None-Match, so an unchanged resource costs a 304 with no body. Return
+    None if the server answers 404.
+    """
+    meta = cache.get(url)
+    if meta is not None and not force_revalidate and cache.is_fresh(meta):
+        return meta
+
+    headers = {}
+    if meta is not None and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    with span("http.get", url=url) as s:
+        response = session.get(url, headers=headers, timeout=timeout)
+        s.set(status=response.status_code, bytes=len(response.content))
+    if response.status_code == 304 and meta is not None:
+        return cache.refresh(meta)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return cache.store(url, response.content, response.headers.get("ETag"))
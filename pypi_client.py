@@ -0,0 +1,188 @@
+"""
+A small PyPI metadata client shared by cf_release.py and its batch tooling.
+
+All requests go through one pooled HTTP session and the on-disk cache from
+http_cache.py. A package's JSON metadata is revalidated with its ETag on every
+lookup, so a release uploaded a minute ago is seen right away while an
+unchanged package costs a 304 without a body. Only packages that have changed
+on PyPI are downloaded again. Pass ``cached=True`` to read a package that is
+already cached without revalidating it, e.g. to list versions offline.
+
+Set the environment variable PYPI_BASE_URL to point the client at a local
+stand-in server, e.g. PYPI_BASE_URL=http://127.0.0.1:8000/pypi.
+
+get_latest_sdists() reads only the release keys and sdist digests from the
+cached JSON. If ijson is installed, the file is parsed as a stream one release
+at a time. Otherwise the standard json module reads the whole file and prunes
+every object as soon as it is decoded, so the project description and the
+wheels and other non-sdist files are dropped at decode time instead of being
+kept in the parsed result. Versions are ordered with PEP 440 semantics, so
+1.10.0 sorts above 1.9.0.
+
+Install the required packages with `conda install requests packaging`; ijson
+is optional.
+"""
+
+import heapq
+import json
+import os
+import threading
+
+from packaging.version import InvalidVersion, Version
+
+from http_cache import DiskCache, cached_get, create_session
+from tracing import span
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+DEFAULT_BASE_URL = "https://pypi.org/pypi"
+
+
+class PyPIClient:
+    """Fetch PyPI JSON metadata through a pooled session and a disk cache."""
+
+    def __init__(self, base_url=None, cache=None, session=None, timeout=10):
+        self.base_url = (
+            base_url or os.environ.get("PYPI_BASE_URL") or DEFAULT_BASE_URL
+        ).rstrip("/")
+        # Always revalidate: the tool is run right after a PyPI upload
+        self.cache = cache or DiskCache(ttl=0)
+        self.timeout = timeout
+        self._session = session
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        # The session is created on first use so that lookups served from the
+        # cache with cached=True never import requests.
+        with self._session_lock:
+            if self._session is None:
+                self._session = create_session()
+        return self._session
+
+    def project_url(self, package_name):
+        return f"{self.base_url}/{package_name}/json"
+
+    def get_project_entry(self, package_name, force_revalidate=False, cached=False):
+        """
+        Return the cache entry holding the package's PyPI JSON metadata.
+
+        The entry's ``body_path`` points at the raw JSON on disk. With
+        ``cached``, an existing entry is returned however old it is. Return
+        None if the package does not exist on PyPI.
+        """
+        url = self.project_url(package_name)
+        meta = self.cache.get(url)
+        if meta is not None and not force_revalidate:
+            if cached or self.cache.is_fresh(meta):
+                return meta
+        return cached_get(
+            self.session,
+            self.cache,
+            url,
+            timeout=self.timeout,
+            force_revalidate=force_revalidate,
+        )
+
+    def get_project_json(self, package_name, force_revalidate=False):
+        """Return the package's PyPI JSON metadata, or None if it does not exist."""
+        meta = self.get_project_entry(package_name, force_revalidate)
+        if meta is None:
+            return None
+        return json.loads(self.cache.read(meta))
+
+    def get_latest_sdists(self, package_name, count=5, cached=False):
+        """
+        Return the latest ``count`` releases of the package that have an sdist.
+
+        Each release is a dictionary with the keys ``version``, ``sha256`` and
+        ``url``, ordered from the newest version to the oldest. Return None if
+        the package does not exist on PyPI. See get_project_entry() for
+        ``cached``.
+        """
+        with span("pypi.latest_sdists", package=package_name):
+            meta = self.get_project_entry(package_name, cached=cached)
+            if meta is None:
+                return None
+            with open(meta["body_path"], "rb") as file:
+                return select_latest_sdists(iter_sdist_releases(file), count)
+
+
+def prune_pypi_object(obj):
+    """
+    Keep only what iter_sdist_releases() reads from a PyPI JSON object.
+
+    Used as the ``object_hook`` of json.load(), which calls it on every object
+    from the innermost outwards: release files other than sdists become None
+    and the project info is dropped.
+    """
+    if "packagetype" in obj:
+        if obj["packagetype"] != "sdist":
+            return None
+        return {"packagetype": "sdist", "digests": obj["digests"], "url": obj["url"]}
+    if "sha256" in obj:
+        return {"sha256": obj["sha256"]}
+    if "releases" in obj:
+        return {"releases": obj["releases"]}
+    if "description" in obj:
+        return None
+    return obj
+
+
+def iter_sdist_releases(file):
+    """
+    Yield a (version, sha256, url) tuple for each release with an sdist.
+
+    ``file`` is a binary file object holding the PyPI JSON metadata. Only the
+    ``releases`` mapping is visited and only the first sdist of each release is
+    kept.
+    """
+    if ijson is not None:
+        releases = ijson.kvitems(file, "releases")
+    else:
+        releases = json.load(file, object_hook=prune_pypi_object)["releases"].items()
+    for version, files in releases:
+        for release_file in files:
+            if release_file is not None and release_file["packagetype"] == "sdist":
+                yield version, release_file["digests"]["sha256"], release_file["url"]
+                break
+
+
+def select_latest_sdists(releases, count):
+    """
+    Keep the ``count`` newest releases using a bounded min-heap.
+
+    ``releases`` yields (version, sha256, url) tuples. Versions that are not
+    valid under PEP 440 are skipped.
+    """
+    heap = []
+    for version, sha256, url in releases:
+        try:
+            key = Version(version)
+        except InvalidVersion:
+            continue
+        item = (key, version, sha256, url)
+        if len(heap) < count:
+            heapq.heappush(heap, item)
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    return [
+        {"version": version, "sha256": sha256, "url": url}
+        for _, version, sha256, url in sorted(heap, reverse=True)
+    ]
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Return the PyPIClient shared by all callers in this process."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PyPIClient()
+    return _default_client
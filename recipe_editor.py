@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+"""
+Edit the version and SHA256 of a conda-forge recipe (meta.yaml).
+
+The recipe is scanned once to locate:
+
+- the value of the Jinja ``{% set version = "..." %}`` statement, or the
+  literal ``package.version`` when the recipe does not use Jinja, and
+- the ``sha256`` value of the ``source`` entry that downloads the PyPI
+  sdist, including recipes with several sources or with sources inside
+  ``outputs``. A ``sha256: {{ sha256 }}`` value is followed to its
+  ``{% set sha256 = "..." %}`` statement.
+
+The new values are applied as character-range patches, so indentation,
+quoting, comments and selectors on the edited lines are preserved, and the
+file is written atomically through a temporary file and a rename.
+
+How to use:
+
+python /path/.../recipe_editor.py <path/to/meta.yaml> <version> <sha256> [--dry-run]
+"""
+
+import argparse
+import difflib
+import re
+
+from fsutils import atomic_write
+from tracing import traced
+
+SET_STATEMENT_TEMPLATE = (
+    r"""\{{%-?\s*set\s+{name}\s*=\s*(["'])(?P<value>[^"']*)\1\s*-?%\}}"""
+)
+SET_VERSION_PATTERN = re.compile(SET_STATEMENT_TEMPLATE.format(name="version"))
+SOURCE_KEY_PATTERN = re.compile(r"^(?P<indent>[ ]*)(?P<dash>-[ ]+)?source:[ ]*(#.*)?$")
+KEY_VALUE_PATTERN = re.compile(
+    r"^(?P<indent>[ ]*)(?P<dash>-[ ]+)?(?P<key>[\w.-]+):[ ]*"
+    r"""(?P<value>"[^"]*"|'[^']*'|\{\{.*?\}\}|[^\s#]+)?"""
+)
+JINJA_EXPRESSION_PATTERN = re.compile(r"^\{\{\s*(?P<name>.*?)\s*\}\}$")
+PYPI_URL_PATTERN = re.compile(
+    r"https?://(pypi\.io|pypi\.org|files\.pythonhosted\.org)/", re.IGNORECASE
+)
+
+
+def split_lines(text):
+    """Return (offset, line) tuples for every line of text, without newlines."""
+    lines = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        lines.append((offset, line.rstrip("\r\n")))
+        offset += len(line)
+    return lines
+
+
+def get_indent(line):
+    return len(line) - len(line.lstrip(" "))
+
+
+def get_key_column(line):
+    """Return the column of the first key on a line, skipping any list dash."""
+    return re.match(r"^[ ]*(-[ ]+)?", line).end()
+
+
+def is_content(line):
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def get_value_span(offset, match):
+    """Return the (start, end) span of a key's value, excluding any quotes."""
+    start, end = match.span("value")
+    if match.group("value")[0] in "\"'":
+        start, end = start + 1, end - 1
+    return offset + start, offset + end
+
+
+def get_block(lines, index, parent_indent):
+    """Return the lines after ``index`` that are nested deeper than parent_indent."""
+    block = []
+    for offset, line in lines[index + 1 :]:
+        if is_content(line) and get_indent(line) <= parent_indent:
+            break
+        block.append((offset, line))
+    return block
+
+
+def split_source_entries(block):
+    """Split a source block into its entries (one per list item, or one mapping)."""
+    content = [(offset, line) for offset, line in block if is_content(line)]
+    if not content:
+        return []
+    if not content[0][1].lstrip().startswith("- "):
+        return [block]
+    list_indent = get_indent(content[0][1])
+    entries = []
+    for offset, line in block:
+        if (
+            is_content(line)
+            and get_indent(line) == list_indent
+            and line.lstrip().startswith("- ")
+        ):
+            entries.append([])
+        if entries:
+            entries[-1].append((offset, line))
+    return entries
+
+
+def find_version_spans(text, lines):
+    """Return the spans holding the recipe version."""
+    match = SET_VERSION_PATTERN.search(text)
+    if match:
+        return [match.span("value")]
+
+    # Fall back to a literal version under the top-level package key
+    for index, (offset, line) in enumerate(lines):
+        if line.rstrip() == "package:":
+            for block_offset, block_line in get_block(lines, index, 0):
+                key_match = KEY_VALUE_PATTERN.match(block_line)
+                if (
+                    key_match
+                    and key_match.group("key") == "version"
+                    and key_match.group("value")
+                ):
+                    return [get_value_span(block_offset, key_match)]
+    return []
+
+
+def resolve_jinja_span(text, span):
+    """
+    Return the span that holds the value written at span.
+
+    A ``{{ name }}`` expression is followed to its ``{% set name = "..." %}``
+    statement. Any other expression is returned whole, so that it is replaced
+    rather than partially overwritten.
+    """
+    match = JINJA_EXPRESSION_PATTERN.match(text[slice(*span)])
+    if not match:
+        return span
+    if re.fullmatch(r"\w+", match.group("name")):
+        pattern = re.compile(SET_STATEMENT_TEMPLATE.format(name=match.group("name")))
+        set_match = pattern.search(text)
+        if set_match:
+            return set_match.span("value")
+    return span
+
+
+def find_sha256_spans(text, lines):
+    """
+    Return the spans of the sha256 values to update.
+
+    Every ``source`` key is visited, at any depth. The entries that download
+    from PyPI (pypi.io, pypi.org or files.pythonhosted.org) are edited. When
+    none does, a single entry with a sha256 is edited. Raise ValueError when
+    the source of the sdist cannot be told apart from the other sources.
+    """
+    candidates = []
+    for index, (offset, line) in enumerate(lines):
+        source_match = SOURCE_KEY_PATTERN.match(line)
+        if not source_match:
+            continue
+        key_column = get_key_column(line)
+        for entry in split_source_entries(get_block(lines, index, key_column)):
+            entry_column = next(
+                get_key_column(line) for _, line in entry if is_content(line)
+            )
+            spans = []
+            for entry_offset, entry_line in entry:
+                key_match = KEY_VALUE_PATTERN.match(entry_line)
+                if (
+                    key_match
+                    and key_match.group("key") == "sha256"
+                    and key_match.group("value")
+                    and get_key_column(entry_line) == entry_column
+                ):
+                    spans.append(get_value_span(entry_offset, key_match))
+            if spans:
+                entry_text = "\n".join(line for _, line in entry)
+                candidates.append((bool(PYPI_URL_PATTERN.search(entry_text)), spans))
+
+    pypi_candidates = [spans for from_pypi, spans in candidates if from_pypi]
+    if pypi_candidates:
+        candidates = pypi_candidates
+    elif len(candidates) > 1:
+        raise ValueError(
+            f"The recipe has {len(candidates)} sources with a sha256 and none of "
+            "them downloads from PyPI, so the sdist source is ambiguous."
+        )
+    else:
+        candidates = [spans for _, spans in candidates]
+    # Sources sharing a {% set sha256 %} statement resolve to the same span
+    return sorted(
+        {resolve_jinja_span(text, span) for spans in candidates for span in spans}
+    )
+
+
+def plan_edits(text, new_version, new_sha256):
+    """Return the (start, end, replacement) patches that bump the recipe."""
+    lines = split_lines(text)
+    version_spans = find_version_spans(text, lines)
+    sha256_spans = find_sha256_spans(text, lines)
+    if not version_spans:
+        raise ValueError("No version has been found in the recipe.")
+    if not sha256_spans:
+        raise ValueError("No source sha256 has been found in the recipe.")
+    patches = [(start, end, new_version) for start, end in version_spans]
+    patches += [(start, end, new_sha256) for start, end in sha256_spans]
+    return sorted(patches)
+
+
+def read_recipe(meta_file_path):
+    """
+    Return the version and sha256 of a recipe.
+
+    The sha256 is that of the first source that would be updated by
+    edit_recipe(). Either value is None when it is not found, and the sha256
+    is also None when the sdist source is ambiguous.
+    """
+    with open(meta_file_path, "r", newline="") as file:
+        text = file.read()
+    lines = split_lines(text)
+    version_spans = find_version_spans(text, lines)
+    try:
+        sha256_spans = find_sha256_spans(text, lines)
+    except ValueError:
+        sha256_spans = []
+    version = text[slice(*version_spans[0])] if version_spans else None
+    sha256 = text[slice(*sha256_spans[0])] if sha256_spans else None
+    return version, sha256
+
+
+def apply_patches(text, patches):
+    """Apply non-overlapping (start, end, replacement) patches in one pass."""
+    pieces = []
+    position = 0
+    for start, end, replacement in patches:
+        pieces.append(text[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+@traced("recipe.edit")
+def edit_recipe(meta_file_path, new_version, new_sha256, dry_run=False):
+    """
+    Update the version and SHA256 of a recipe.
+
+    Return a unified diff of the change, which is empty if the recipe is
+    already up to date. With ``dry_run`` the file is left untouched.
+    """
+    with open(meta_file_path, "r", newline="") as file:
+        text = file.read()
+    new_text = apply_patches(text, plan_edits(text, new_version, new_sha256))
+    diff = "".join(
+        difflib.unified_diff(
+            text.splitlines(keepends=True),
+            new_text.splitlines(keepends=True),
+            fromfile=str(meta_file_path),
+            tofile=str(meta_file_path),
+        )
+    )
+    if diff and not dry_run:
+        atomic_write(meta_file_path, new_text)
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update the version and SHA256 of a conda-forge recipe."
+    )
+    parser.add_argument("meta_file_path")
+    parser.add_argument("version")
+    parser.add_argument("sha256")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the diff without modifying the recipe.",
+    )
+    args = parser.parse_args()
+    diff = edit_recipe(args.meta_file_path, args.version, args.sha256, args.dry_run)
+    print(diff or f"{args.meta_file_path} is already up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""
+Verify that the sdists published on PyPI match the SHA256 digests reported
+by the PyPI JSON API before they are written into a feedstock's meta.yaml.
+
+Each sdist is downloaded in fixed-size chunks and hashed incrementally, so
+memory use stays bounded even for large C-extension sdists. Verified
+tarballs are kept in a content-addressed cache (named after their SHA256),
+so an sdist that has been verified before is only re-hashed from disk.
+
+How to use:
+
+python /path/.../sdist_verify.py <package_name> [--count 5] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from http_cache import DEFAULT_CACHE_DIR
+from pypi_client import get_default_client
+from tracing import traced
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_sdist_cache_path(sha256, cache_dir=None):
+    """Return the content-addressed cache path of an sdist."""
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR / "sdists")
+    return cache_dir / sha256[:2] / sha256
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """Return the SHA256 of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_and_hash(session, url, dest_dir, chunk_size=CHUNK_SIZE, timeout=30):
+    """
+    Stream url into a temporary file in dest_dir while hashing it.
+
+    Return the temporary file path and the SHA256 of the downloaded content.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".download-")
+    try:
+        with session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            with os.fdopen(fd, "wb") as file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    digest.update(chunk)
+                    file.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return Path(tmp_path), digest.hexdigest()
+
+
+@traced("sdist.verify")
+def verify_sdist(url, expected_sha256, session=None, cache_dir=None):
+    """
+    Check that the sdist at url hashes to expected_sha256.
+
+    A tarball already in the cache is re-hashed from disk instead of being
+    downloaded again. Raise ValueError if the digests do not match.
+    """
+    cache_path = get_sdist_cache_path(expected_sha256, cache_dir)
+    if cache_path.exists() and hash_file(cache_path) == expected_sha256:
+        return cache_path
+
+    session = session or get_default_client().session
+    tmp_path, actual_sha256 = download_and_hash(session, url, cache_path.parent)
+    if actual_sha256 != expected_sha256:
+        tmp_path.unlink()
+        raise ValueError(
+            f"SHA256 mismatch for {url}: PyPI reports {expected_sha256} "
+            f"but the downloaded sdist hashes to {actual_sha256}."
+        )
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def verify_releases(releases, max_workers=4, session=None, cache_dir=None):
+    """
+    Verify several releases in parallel.
+
+    ``releases`` is a list of dictionaries with the keys ``version``, ``sha256``
+    and ``url`` as returned by PyPIClient.get_latest_sdists(). Return a
+    dictionary mapping each version to None on success or to an error message.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            release["version"]: executor.submit(
+                verify_sdist, release["url"], release["sha256"], session, cache_dir
+            )
+            for release in releases
+        }
+        results = {}
+        for version, future in futures.items():
+            try:
+                future.result()
+                results[version] = None
+            except Exception as e:
+                results[version] = str(e)
+    return results
+
+
+def verify_package_version(package_name, version, count=5):
+    """Verify the sdist of one of the latest versions of a package."""
+    releases = get_default_client().get_latest_sdists(package_name, count) or []
+    for release in releases:
+        if release["version"] == version:
+            return verify_sdist(release["url"], release["sha256"])
+    raise ValueError(f"No sdist has been found for {package_name} {version}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify the SHA256 of the latest sdists of a PyPI package."
+    )
+    parser.add_argument("package_name")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    releases = get_default_client().get_latest_sdists(args.package_name, args.count)
+    if releases is None:
+        parser.error(f"No matching package has been found for {args.package_name}.")
+    results = verify_releases(releases, max_workers=args.workers)
+    for version, error in results.items():
+        print(f" - Version: {version}, {'OK' if error is None else error}")
+    if any(error is not None for error in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import atexit
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+# The release scripts are top-level modules rather than an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Keep the default caches and workspaces of the scripts out of the user's home
+os.environ["RELEASE_SCRIPTS_CACHE"] = tempfile.mkdtemp(prefix="release-scripts-")
+atexit.register(shutil.rmtree, os.environ["RELEASE_SCRIPTS_CACHE"], True)
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the routes of a StandInServer with ETags, as PyPI and GitHub do."""
+
+    def do_GET(self):
+        server = self.server.stand_in
+        body = server.routes.get(self.path)
+        if body is None:
+            status = 404
+        else:
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            status = 304 if self.headers.get("If-None-Match") == etag else 200
+        server.requests.append((self.path, status))
+        self.send_response(status)
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """A local HTTP server standing in for PyPI and GitHub in tests."""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.httpd.stand_in = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def add_json(self, path, data):
+        self.routes[path] = json.dumps(data).encode()
+
+    def statuses(self, path):
+        return [
+            status for request_path, status in self.requests if request_path == path
+        ]
+
+
+def make_pypi_json(versions, prereleases=()):
+    """Return PyPI JSON metadata with an sdist for every version."""
+    return {
+        "info": {},
+        "releases": {
+            version: [
+                {
+                    "packagetype": "sdist",
+                    "digests": {"sha256": hashlib.sha256(version.encode()).hexdigest()},
+                    "url": f"https://files.pythonhosted.org/foo-{version}.tar.gz",
+                }
+            ]
+            for version in [*versions, *prereleases]
+        },
+    }
+
+
+@pytest.fixture
+def stand_in_server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def pypi_client(stand_in_server, tmp_path, monkeypatch):
+    """Return a PyPIClient reading from the stand-in server through PYPI_BASE_URL."""
+    from http_cache import DiskCache
+    from pypi_client import PyPIClient
+
+    monkeypatch.setenv("PYPI_BASE_URL", f"{stand_in_server.url}/pypi")
+    return PyPIClient(cache=DiskCache(tmp_path / "http", ttl=0))
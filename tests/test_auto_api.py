@@ -0,0 +1,29 @@
+from optparse import Values
+
+import auto_api
+
+
+def test_ast_keeps_unparsable_modules_and_caches_outside_api_dir(
+    tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setattr(auto_api, "INDEX_DIR", tmp_path / "cache")
+    package_dir = tmp_path / "src" / "pkg"
+    package_dir.mkdir(parents=True)
+    (package_dir / "__init__.py").write_text("")
+    (package_dir / "good.py").write_text("def run():\n    pass\n")
+    (package_dir / "empty.py").write_text("_private = 1\n")
+    (package_dir / "broken.py").write_text("def run(:\n")
+    (package_dir / "latin.py").write_bytes(b"name = '\xe9'\n")
+    api_dir = tmp_path / "api"
+    api_dir.mkdir()
+    opts = Values({"ast": True, "incremental": False, "trace": None})
+
+    auto_api.main(opts, ["pkg", str(package_dir), str(api_dir)])
+
+    content = (api_dir / "pkg.rst").read_text()
+    for name in ("good", "broken", "latin"):
+        assert f".. automodule:: pkg.{name}\n" in content
+    assert "pkg.empty" not in content
+    assert "Warning: could not parse" in capsys.readouterr().out
+    assert sorted(path.name for path in api_dir.iterdir()) == ["pkg.rst"]
+    assert auto_api.get_index_path(api_dir.resolve()).exists()
@@ -0,0 +1,64 @@
+import click
+import pytest
+from conftest import make_pypi_json
+
+import cf_release
+import pypi_client as pypi_client_module
+
+
+@pytest.fixture
+def default_client(pypi_client, monkeypatch):
+    """Make the stand-in client the one used by get_package_versions_SHA()."""
+    monkeypatch.setattr(pypi_client_module, "_default_client", pypi_client)
+    return pypi_client
+
+
+def test_versions_cached_does_not_revalidate(default_client, stand_in_server):
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.0.0"]))
+    cf_release.run_cli(["versions", "foo"])
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.0.0", "1.1.0"]))
+
+    assert list(cf_release.run_cli(["versions", "foo", "--cached"])) == ["1.0.0"]
+    assert list(cf_release.run_cli(["versions", "foo"])) == ["1.1.0", "1.0.0"]
+    assert stand_in_server.statuses("/pypi/foo/json") == [200, 200]
+
+
+def test_batch_returns_exit_status_in_process(default_client, tmp_path, monkeypatch):
+    manifest_path = tmp_path / "packages.txt"
+    manifest_path.write_text("missing\n")
+    monkeypatch.setattr(cf_release, "get_github_username", lambda: "me")
+
+    assert cf_release.run_cli(["batch", str(manifest_path)]) == 1
+
+
+def test_batch_shows_errors_without_traceback(default_client, tmp_path, monkeypatch):
+    manifest_path = tmp_path / "packages.txt"
+    manifest_path.write_text("missing\n")
+
+    def get_github_username():
+        raise RuntimeError("Could not retrieve GitHub username using GitHub CLI.")
+
+    monkeypatch.setattr(cf_release, "get_github_username", get_github_username)
+
+    with pytest.raises(click.ClickException, match="GitHub username"):
+        cf_release.run_cli(["batch", str(manifest_path)])
+
+
+def test_read_batch_manifest(tmp_path):
+    manifest_path = tmp_path / "packages.txt"
+    manifest_path.write_text(
+        "# feedstocks\ndiffpy.utils\n\ndiffpy.structure==3.2.0  # pinned\n"
+    )
+
+    assert cf_release.read_batch_manifest(manifest_path) == [
+        ("diffpy.utils", None),
+        ("diffpy.structure", "3.2.0"),
+    ]
+
+
+def test_read_batch_manifest_rejects_repeated_packages(tmp_path):
+    manifest_path = tmp_path / "packages.txt"
+    manifest_path.write_text("diffpy.utils==3.5.0\nfoo\ndiffpy.utils==3.6.0\n")
+
+    with pytest.raises(ValueError, match=r"diffpy.utils is listed twice .*1 and 3"):
+        cf_release.read_batch_manifest(manifest_path)
@@ -0,0 +1,81 @@
+import importlib.util
+import subprocess
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).resolve().parents[1] / ".github/workflows/check-news.py"
+TEMPLATE = "**Added:**\n\n* <news item>\n\n**Fixed:**\n\n* <news item>\n"
+
+
+def load_check_news():
+    spec = importlib.util.spec_from_file_location("check_news", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+check_news = load_check_news()
+
+
+def git(*args):
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A repository with a feature branch created from main."""
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@example.com")
+    monkeypatch.chdir(tmp_path)
+    git("init", "--quiet", "--initial-branch", "main")
+    (tmp_path / "news").mkdir()
+    (tmp_path / "news" / "TEMPLATE.rst").write_text(TEMPLATE)
+    git("add", ".")
+    git("commit", "--quiet", "-m", "Initial commit")
+    git("checkout", "--quiet", "-b", "feature")
+    return tmp_path
+
+
+def commit_news(repo, content):
+    (repo / "news" / "feature.rst").write_text(content)
+    git("add", "news/feature.rst")
+    git("commit", "--quiet", "-m", "Add news")
+
+
+def test_check_local_accepts_committed_news(repo):
+    commit_news(repo, TEMPLATE.replace("* <news item>", "* Add a feature.", 1))
+
+    assert check_news.check_local() == []
+
+
+def test_check_local_requires_news(repo):
+    [problem] = check_news.check_local()
+
+    assert problem.startswith("No news item is found since main.")
+
+
+def test_check_local_reports_invalid_news(repo):
+    commit_news(repo, "**Improved:**\n\n* Something.\n")
+
+    [problem] = check_news.check_local()
+
+    assert "unknown category 'Improved'" in problem
+
+
+def test_check_local_falls_back_to_origin(repo):
+    commit_news(repo, TEMPLATE.replace("* <news item>", "* Add a feature.", 1))
+    git("update-ref", "refs/remotes/origin/main", "main")
+    git("branch", "--quiet", "-D", "main")
+
+    assert check_news.resolve_base("main") == "origin/main"
+    assert check_news.check_local() == []
+
+
+def test_check_local_without_base_branch(repo):
+    git("branch", "--quiet", "-D", "main")
+
+    [problem] = check_news.check_local()
+
+    assert problem.startswith("Neither main nor origin/main is found.")
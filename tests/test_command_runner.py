@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+from cf_release import format_failure
+from command_runner import CommandReport
+
+FAILING_COMMAND = [
+    sys.executable,
+    "-c",
+    "import sys; sys.stderr.write('fatal: remote rejected\\nerror: push failed\\n');"
+    " sys.exit(128)",
+]
+
+
+def test_failed_command_error_includes_stderr():
+    report = CommandReport("foo")
+
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        report.run(FAILING_COMMAND)
+
+    assert info.value.returncode == 128
+    assert format_failure(info.value).endswith("fatal: remote rejected")
+    assert report.results[0]["stderr"].startswith("fatal: remote rejected")
+
+
+def test_print_summary_shows_stderr_of_failed_commands(capsys):
+    report = CommandReport("foo")
+    report.run([sys.executable, "-c", "import sys; sys.stderr.write('progress')"])
+    report.run(FAILING_COMMAND, check=False)
+
+    report.print_summary()
+
+    output = capsys.readouterr().out
+    assert "FAILED" in output
+    assert "     fatal: remote rejected\n     error: push failed\n" in output
+    assert "     progress" not in output
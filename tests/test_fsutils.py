@@ -0,0 +1,44 @@
+import os
+import stat
+import threading
+
+from fsutils import UMASK, atomic_write
+
+
+def test_atomic_write_creates_file_with_umask(tmp_path):
+    path = tmp_path / "new.txt"
+
+    atomic_write(path, "content")
+
+    assert path.read_text() == "content"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~UMASK
+    assert os.listdir(tmp_path) == ["new.txt"]
+
+
+def test_atomic_write_keeps_mode_of_existing_file(tmp_path):
+    path = tmp_path / "script.py"
+    path.write_text("old")
+    path.chmod(0o750)
+
+    atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o750
+
+
+def test_atomic_write_leaves_process_umask_alone(tmp_path):
+    modes = []
+
+    def create_dirs():
+        for i in range(200):
+            directory = tmp_path / f"dir-{i}"
+            directory.mkdir()
+            modes.append(stat.S_IMODE(directory.stat().st_mode))
+
+    thread = threading.Thread(target=create_dirs)
+    thread.start()
+    for i in range(200):
+        atomic_write(tmp_path / f"file-{i}.txt", "content")
+    thread.join()
+
+    assert set(modes) == {0o777 & ~UMASK}
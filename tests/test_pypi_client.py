@@ -0,0 +1,106 @@
+import io
+import json
+
+import pytest
+from conftest import make_pypi_json
+
+import http_cache
+import pypi_client
+from pypi_client import PyPIClient
+
+
+def test_latest_sdists_are_ordered_by_pep_440(stand_in_server, pypi_client):
+    stand_in_server.add_json(
+        "/pypi/foo/json", make_pypi_json(["1.9.0", "1.10.0", "1.2.0", "not-a-version"])
+    )
+
+    releases = pypi_client.get_latest_sdists("foo", count=2)
+
+    assert [release["version"] for release in releases] == ["1.10.0", "1.9.0"]
+
+
+def test_new_upload_is_seen_on_next_lookup(stand_in_server, pypi_client):
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.0.0"]))
+    assert pypi_client.get_latest_sdists("foo")[0]["version"] == "1.0.0"
+    assert pypi_client.get_latest_sdists("foo")[0]["version"] == "1.0.0"
+
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.0.0", "1.1.0"]))
+
+    assert pypi_client.get_latest_sdists("foo")[0]["version"] == "1.1.0"
+    # Unchanged metadata is revalidated without downloading it again
+    assert stand_in_server.statuses("/pypi/foo/json") == [200, 304, 200]
+
+
+def test_missing_package_returns_none(stand_in_server, pypi_client):
+    assert pypi_client.get_latest_sdists("missing") is None
+
+
+def test_default_cache_revalidates(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "DEFAULT_CACHE_DIR", tmp_path)
+
+    assert PyPIClient().cache.ttl == 0
+
+
+PYPI_JSON = {
+    "info": {"name": "foo", "description": "x" * 1000, "classifiers": ["a", "b"]},
+    "releases": {
+        "1.0.0": [
+            {
+                "packagetype": "bdist_wheel",
+                "digests": {"md5": "w", "sha256": "wheel"},
+                "url": "https://files.pythonhosted.org/foo-1.0.0-py3-none-any.whl",
+                "filename": "foo-1.0.0-py3-none-any.whl",
+            },
+            {
+                "packagetype": "sdist",
+                "digests": {"md5": "s", "sha256": "sdist"},
+                "url": "https://files.pythonhosted.org/foo-1.0.0.tar.gz",
+                "yanked": False,
+            },
+        ],
+        "1.1.0": [
+            {
+                "packagetype": "bdist_wheel",
+                "digests": {"sha256": "wheel"},
+                "url": "https://files.pythonhosted.org/foo-1.1.0-py3-none-any.whl",
+            }
+        ],
+        "0.9.0": [],
+    },
+    "urls": [],
+    "vulnerabilities": [{"id": "V-1", "details": "d"}],
+}
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_sdist_releases(use_ijson, monkeypatch):
+    if use_ijson:
+        monkeypatch.setattr(pypi_client, "ijson", pytest.importorskip("ijson"))
+    else:
+        monkeypatch.setattr(pypi_client, "ijson", None)
+    file = io.BytesIO(json.dumps(PYPI_JSON).encode())
+
+    assert list(pypi_client.iter_sdist_releases(file)) == [
+        ("1.0.0", "sdist", "https://files.pythonhosted.org/foo-1.0.0.tar.gz")
+    ]
+
+
+def test_prune_pypi_object_keeps_only_sdists():
+    pruned = json.loads(
+        json.dumps(PYPI_JSON), object_hook=pypi_client.prune_pypi_object
+    )
+
+    assert pruned == {
+        "releases": {
+            "1.0.0": [
+                None,
+                {
+                    "packagetype": "sdist",
+                    "digests": {"sha256": "sdist"},
+                    "url": "https://files.pythonhosted.org/foo-1.0.0.tar.gz",
+                },
+            ],
+            "1.1.0": [None],
+            "0.9.0": [],
+        }
+    }
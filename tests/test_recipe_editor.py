@@ -0,0 +1,161 @@
+import pytest
+
+from recipe_editor import edit_recipe, read_recipe
+
+OLD_SHA = "a" * 64
+NEW_SHA = "b" * 64
+LICENSE_SHA = "c" * 64
+
+
+def write_recipe(tmp_path, text):
+    meta_file_path = tmp_path / "meta.yaml"
+    meta_file_path.write_text(text)
+    return meta_file_path
+
+
+def test_edit_recipe_follows_jinja_sha256(tmp_path):
+    meta_file_path = write_recipe(
+        tmp_path,
+        f"""{{% set name = "foo" %}}
+{{% set version = "3.5.0" %}}
+{{% set sha256 = "{OLD_SHA}" %}}
+
+package:
+  name: {{{{ name|lower }}}}
+  version: {{{{ version }}}}
+
+source:
+  url: https://pypi.io/packages/source/f/foo/foo-{{{{ version }}}}.tar.gz
+  sha256: {{{{ sha256 }}}}  # from PyPI
+""",
+    )
+    assert read_recipe(meta_file_path) == ("3.5.0", OLD_SHA)
+
+    edit_recipe(meta_file_path, "3.6.0", NEW_SHA)
+
+    text = meta_file_path.read_text()
+    assert f'{{% set sha256 = "{NEW_SHA}" %}}' in text
+    assert "  sha256: {{ sha256 }}  # from PyPI\n" in text
+    assert read_recipe(meta_file_path) == ("3.6.0", NEW_SHA)
+
+
+def test_edit_recipe_replaces_whole_jinja_expression(tmp_path):
+    meta_file_path = write_recipe(
+        tmp_path,
+        """{% set version = "1.0.0" %}
+
+package:
+  version: {{ version }}
+
+source:
+  url: https://files.pythonhosted.org/packages/source/f/foo/foo-{{ version }}.tar.gz
+  sha256: {{ hashes[version] }}
+""",
+    )
+    edit_recipe(meta_file_path, "1.1.0", NEW_SHA)
+
+    assert f"  sha256: {NEW_SHA}\n" in meta_file_path.read_text()
+
+
+def test_edit_recipe_only_updates_pypi_source(tmp_path):
+    meta_file_path = write_recipe(
+        tmp_path,
+        f"""{{% set version = "1.0.0" %}}
+
+package:
+  version: {{{{ version }}}}
+
+source:
+  - url: https://pypi.org/packages/source/f/foo/foo-{{{{ version }}}}.tar.gz
+    sha256: {OLD_SHA}
+  - url: https://raw.githubusercontent.com/foo/foo/{{{{ version }}}}/LICENSE
+    sha256: {LICENSE_SHA}
+""",
+    )
+    edit_recipe(meta_file_path, "1.1.0", NEW_SHA)
+
+    text = meta_file_path.read_text()
+    assert f"    sha256: {NEW_SHA}\n" in text
+    assert f"    sha256: {LICENSE_SHA}\n" in text
+    assert OLD_SHA not in text
+
+
+def test_edit_recipe_updates_pypi_source_of_outputs(tmp_path):
+    meta_file_path = write_recipe(
+        tmp_path,
+        f"""{{% set version = "1.0.0" %}}
+
+package:
+  name: foo-split
+  version: {{{{ version }}}}
+
+outputs:
+  - name: foo
+    source:
+      url: https://pypi.io/packages/source/f/foo/foo-{{{{ version }}}}.tar.gz
+      sha256: {OLD_SHA}
+  - name: foo-data
+    source:
+      url: https://github.com/foo/foo-data/archive/{{{{ version }}}}.tar.gz
+      sha256: {LICENSE_SHA}
+""",
+    )
+    edit_recipe(meta_file_path, "1.1.0", NEW_SHA)
+
+    text = meta_file_path.read_text()
+    assert f"      sha256: {NEW_SHA}\n" in text
+    assert f"      sha256: {LICENSE_SHA}\n" in text
+
+
+def test_edit_recipe_updates_single_non_pypi_source(tmp_path):
+    meta_file_path = write_recipe(
+        tmp_path,
+        f"""package:
+  name: foo
+  version: "1.0.0"
+
+source:
+  url: https://github.com/foo/foo/archive/1.0.0.tar.gz
+  sha256: '{OLD_SHA}'
+""",
+    )
+    edit_recipe(meta_file_path, "1.1.0", NEW_SHA)
+
+    text = meta_file_path.read_text()
+    assert '  version: "1.1.0"\n' in text
+    assert f"  sha256: '{NEW_SHA}'\n" in text
+
+
+def test_edit_recipe_refuses_ambiguous_sources(tmp_path):
+    text = f"""{{% set version = "1.0.0" %}}
+
+package:
+  version: {{{{ version }}}}
+
+source:
+  - url: https://github.com/foo/foo/archive/{{{{ version }}}}.tar.gz
+    sha256: {OLD_SHA}
+  - url: https://raw.githubusercontent.com/foo/foo/{{{{ version }}}}/LICENSE
+    sha256: {LICENSE_SHA}
+"""
+    meta_file_path = write_recipe(tmp_path, text)
+
+    with pytest.raises(ValueError, match="ambiguous"):
+        edit_recipe(meta_file_path, "1.1.0", NEW_SHA)
+    assert meta_file_path.read_text() == text
+    assert read_recipe(meta_file_path) == ("1.0.0", None)
+
+
+def test_edit_recipe_dry_run_returns_diff(tmp_path):
+    text = f"""{{% set version = "1.0.0" %}}
+
+source:
+  url: https://pypi.io/packages/source/f/foo/foo-{{{{ version }}}}.tar.gz
+  sha256: {OLD_SHA}
+"""
+    meta_file_path = write_recipe(tmp_path, text)
+
+    diff = edit_recipe(meta_file_path, "1.1.0", NEW_SHA, dry_run=True)
+
+    assert f"+  sha256: {NEW_SHA}" in diff
+    assert meta_file_path.read_text() == text
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import update_workflow
+
+TEMPLATE = """name: Tests
+env:
+  PROJECT: {{ PROJECT / project }}
+  C_EXTENSION: {{ C_EXTENSION / false }}
+  PYTHON: {{ PYTHON / 3.12 }}
+"""
+
+
+@pytest.fixture
+def central_templates(stand_in_server, monkeypatch):
+    """Serve the central templates through WORKFLOW_TEMPLATES_URL."""
+    stand_in_server.routes["/templates/tests.yml"] = TEMPLATE.encode()
+    stand_in_server.add_json(
+        "/contents",
+        [
+            {
+                "name": "tests.yml",
+                "type": "file",
+                "download_url": f"{stand_in_server.url}/templates/tests.yml",
+            }
+        ],
+    )
+    monkeypatch.setenv("WORKFLOW_TEMPLATES_URL", f"{stand_in_server.url}/contents")
+    return stand_in_server
+
+
+def make_repo(tmp_path, name, params):
+    repo_path = tmp_path / name
+    (repo_path / ".github").mkdir(parents=True)
+    (repo_path / ".github" / "workflow-params.json").write_text(json.dumps(params))
+    return repo_path
+
+
+def test_read_repo_params_writes_json_values_like_prompts(tmp_path):
+    repo_path = make_repo(
+        tmp_path, "pkg", {"C_EXTENSION": False, "HEADLESS": "True", "PYTHON": 3.13}
+    )
+
+    assert update_workflow.read_repo_params(repo_path) == {
+        "PROJECT": "pkg",
+        "C_EXTENSION": "false",
+        "HEADLESS": "true",
+        "PYTHON": "3.13",
+    }
+
+
+def test_fleet_and_interactive_output_match(central_templates, tmp_path, monkeypatch):
+    repo_path = make_repo(tmp_path, "pkg", {"C_EXTENSION": False})
+    monkeypatch.setattr(update_workflow, "user_input_cache", {})
+    answers = iter(["pkg", "False", ""])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+
+    [content] = update_workflow.get_central_workflows().values()
+    interactive = update_workflow.update_workflow_params(content)
+    results = update_workflow.sync_fleet([repo_path])
+
+    assert "  C_EXTENSION: false\n" in interactive
+    assert results[repo_path]["tests.yml"] == (None, interactive)
+    assert (repo_path / ".github" / "workflows" / "tests.yml").read_text() == (
+        interactive
+    )
+
+
+def test_fleet_check_reports_no_drift_after_sync(central_templates, tmp_path):
+    repo_paths = [
+        make_repo(tmp_path, "a", {"C_EXTENSION": True}),
+        make_repo(tmp_path, "b", {"C_EXTENSION": False}),
+    ]
+    update_workflow.sync_fleet(repo_paths)
+
+    results = update_workflow.sync_fleet(repo_paths, check=True)
+
+    assert results == {repo_path: {} for repo_path in repo_paths}
+    assert (
+        "C_EXTENSION: true"
+        in (repo_paths[0] / ".github" / "workflows" / "tests.yml").read_text()
+    )
@@ -0,0 +1,123 @@
+import pytest
+from conftest import make_pypi_json
+
+import version_watch
+
+INTERVALS = (60, 3600)
+
+
+def make_recipe(version):
+    return f"""{{% set version = "{version}" %}}
+
+package:
+  version: {{{{ version }}}}
+
+source:
+  url: https://pypi.io/packages/source/f/foo/foo-{{{{ version }}}}.tar.gz
+  sha256: {"a" * 64}
+""".encode()
+
+
+@pytest.fixture
+def watch_db(stand_in_server, tmp_path, monkeypatch):
+    monkeypatch.setenv(
+        "FEEDSTOCK_RECIPE_URL", f"{stand_in_server.url}/recipes/{{feedstock}}/meta.yaml"
+    )
+    stand_in_server.routes["/recipes/foo-feedstock/meta.yaml"] = make_recipe("1.9.0")
+    connection = version_watch.connect(tmp_path / "watch.sqlite3")
+    version_watch.set_packages(connection, ["foo"], INTERVALS[0])
+    yield connection
+    connection.close()
+
+
+def poll_all(connection, client, pre=False):
+    # Make every package due instead of waiting for its interval
+    connection.execute("UPDATE packages SET next_check = 0")
+    return version_watch.run_due_polls(
+        connection, client, INTERVALS, jitter=0, workers=2, pre=pre
+    )
+
+
+def test_newer_release_is_queued_once(stand_in_server, pypi_client, watch_db):
+    stand_in_server.add_json(
+        "/pypi/foo/json", make_pypi_json(["1.9.0", "2.0.0"], prereleases=["2.1.0rc1"])
+    )
+
+    assert poll_all(watch_db, pypi_client) == [("foo", "2.0.0")]
+    assert poll_all(watch_db, pypi_client) == []
+
+    jobs = version_watch.get_jobs(watch_db, "queued")
+    assert [(job["version"], job["release_type"]) for job in jobs] == [
+        ("2.0.0", "release")
+    ]
+    # The unchanged package is revalidated and its recipe is not fetched again
+    assert stand_in_server.statuses("/pypi/foo/json") == [200, 304]
+    assert stand_in_server.statuses("/recipes/foo-feedstock/meta.yaml") == [200]
+
+
+def test_prerelease_is_only_queued_with_pre(stand_in_server, pypi_client, watch_db):
+    stand_in_server.add_json(
+        "/pypi/foo/json", make_pypi_json(["1.9.0"], prereleases=["2.0.0rc1"])
+    )
+
+    assert poll_all(watch_db, pypi_client) == []
+    watch_db.execute("UPDATE packages SET etag = NULL")
+    assert poll_all(watch_db, pypi_client, pre=True) == [("foo", "2.0.0rc1")]
+
+    assert version_watch.get_jobs(watch_db, "queued", "release") == []
+    [job] = version_watch.get_jobs(watch_db, "queued", "pre-release")
+    assert job["version"] == "2.0.0rc1"
+
+
+def test_release_supersedes_queued_jobs(stand_in_server, pypi_client, watch_db):
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.9.0", "2.0.0"]))
+    poll_all(watch_db, pypi_client)
+    stand_in_server.add_json(
+        "/pypi/foo/json", make_pypi_json(["1.9.0", "2.0.0", "2.0.1"])
+    )
+
+    assert poll_all(watch_db, pypi_client) == [("foo", "2.0.1")]
+
+    statuses = {
+        job["version"]: job["status"] for job in version_watch.get_jobs(watch_db)
+    }
+    assert statuses == {"2.0.0": "superseded", "2.0.1": "queued"}
+
+
+def test_interval_backs_off_until_package_changes(
+    stand_in_server, pypi_client, watch_db
+):
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.9.0"]))
+
+    def get_interval():
+        return watch_db.execute("SELECT interval FROM packages").fetchone()[0]
+
+    poll_all(watch_db, pypi_client)
+    assert get_interval() == 60
+    poll_all(watch_db, pypi_client)
+    poll_all(watch_db, pypi_client)
+    assert get_interval() == 240
+
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.9.0", "1.9.1"]))
+    poll_all(watch_db, pypi_client)
+    assert get_interval() == 60
+
+
+def test_missing_package_is_recorded_as_error(pypi_client, watch_db):
+    version_watch.set_packages(watch_db, ["missing"], INTERVALS[0])
+
+    assert poll_all(watch_db, pypi_client) == []
+
+    row = watch_db.execute("SELECT name, last_error FROM packages").fetchone()
+    assert row["name"] == "missing"
+    assert "not found on PyPI" in row["last_error"]
+
+
+def test_set_packages_drops_unlisted_packages(watch_db):
+    version_watch.set_packages(watch_db, ["foo", "bar", "baz"], INTERVALS[0])
+
+    removed = version_watch.set_packages(watch_db, ["bar", "qux", "bar"], 10)
+
+    names = [row[0] for row in watch_db.execute("SELECT name FROM packages")]
+    assert removed == 2
+    assert sorted(names) == ["bar", "qux"]
@@ -0,0 +1,61 @@
+import pytest
+
+from http_cache import DiskCache, create_session
+from workflow_fetcher import fetch_central_workflows
+
+
+@pytest.fixture
+def templates(stand_in_server, monkeypatch):
+    """Serve two templates through WORKFLOW_TEMPLATES_URL."""
+    listing = [{"name": "README.md", "type": "file", "download_url": "unused"}]
+    for name in ("tests.yml", "release.yml"):
+        stand_in_server.routes[f"/templates/{name}"] = f"name: {name}\n".encode()
+        listing.append(
+            {
+                "name": name,
+                "type": "file",
+                "download_url": f"{stand_in_server.url}/templates/{name}",
+            }
+        )
+    stand_in_server.add_json("/contents", listing)
+    monkeypatch.setenv("WORKFLOW_TEMPLATES_URL", f"{stand_in_server.url}/contents")
+    return stand_in_server
+
+
+def test_fetch_revalidates_unchanged_templates(templates, tmp_path):
+    cache = DiskCache(tmp_path, ttl=0)
+
+    first = fetch_central_workflows(cache=cache)
+    templates.routes["/templates/tests.yml"] = b"name: tests.yml\non: push\n"
+    second = fetch_central_workflows(cache=cache)
+
+    assert first == {
+        "tests.yml": "name: tests.yml\n",
+        "release.yml": "name: release.yml\n",
+    }
+    assert second["tests.yml"] == "name: tests.yml\non: push\n"
+    assert templates.statuses("/contents") == [200, 304]
+    assert templates.statuses("/templates/release.yml") == [200, 304]
+    assert templates.statuses("/templates/tests.yml") == [200, 200]
+
+
+def test_fetch_falls_back_to_cache_when_offline(templates, tmp_path, capsys):
+    cache = DiskCache(tmp_path, ttl=0)
+    expected = fetch_central_workflows(cache=cache)
+    templates.httpd.shutdown()
+    templates.httpd.server_close()
+
+    workflows = fetch_central_workflows(cache=cache, session=create_session(retries=0))
+
+    assert workflows == expected
+    assert f"Using cached copy of {templates.url}/contents" in capsys.readouterr().out
+
+
+def test_fetch_without_cache_fails_when_offline(templates, tmp_path):
+    templates.httpd.shutdown()
+    templates.httpd.server_close()
+
+    with pytest.raises(OSError):
+        fetch_central_workflows(
+            cache=DiskCache(tmp_path, ttl=0), session=create_session(retries=0)
+        )
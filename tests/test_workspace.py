@@ -0,0 +1,158 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from conftest import make_pypi_json
+
+import cf_release
+import pypi_client as pypi_client_module
+import workspace
+from feedstock_state import get_state_path
+
+RECIPE = (
+    '{% set version = "1.0.0" %}\n'
+    "\n"
+    "package:\n"
+    "  version: {{ version }}\n"
+    "\n"
+    "source:\n"
+    "  url: https://pypi.io/packages/source/f/foo/foo-{{ version }}.tar.gz\n"
+    f"  sha256: {'a' * 64}\n"
+)
+
+FAKE_GH = """#!{python}
+import sys
+
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(" ".join(args) + "\\n")
+if args[:2] == ["api", "user"]:
+    print("me")
+elif args[:2] == ["pr", "list"]:
+    print("[]")
+elif args[:2] == ["pr", "create"]:
+    print("https://github.com/conda-forge/foo-feedstock/pull/1")
+"""
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def make_upstream(root, name, files):
+    """Create a bare feedstock repository with two commits on main."""
+    source = root / "source" / name
+    source.mkdir(parents=True)
+    git("init", "--quiet", "--initial-branch", "main", cwd=source)
+    (source / "README.md").write_text("first\n")
+    git("add", ".", cwd=source)
+    git("commit", "--quiet", "-m", "First", cwd=source)
+    for path, content in files.items():
+        (source / path).parent.mkdir(parents=True, exist_ok=True)
+        (source / path).write_text(content)
+    git("add", ".", cwd=source)
+    git("commit", "--quiet", "-m", "Second", cwd=source)
+    bare = root / "conda-forge" / f"{name}.git"
+    git("clone", "--quiet", "--bare", str(source), str(bare))
+    # Like GitHub, serve partial clones
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    return source, bare
+
+
+@pytest.fixture
+def feedstocks(tmp_path, monkeypatch):
+    """Serve local bare repositories through the FEEDSTOCK_*_URL variables."""
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@example.com")
+    monkeypatch.setenv(
+        "FEEDSTOCK_UPSTREAM_URL", f"file://{tmp_path}/conda-forge/{{feedstock}}.git"
+    )
+    monkeypatch.setenv(
+        "FEEDSTOCK_ORIGIN_URL", f"file://{tmp_path}/{{username}}/{{feedstock}}.git"
+    )
+    monkeypatch.setattr(workspace, "DEFAULT_WORKSPACE_DIR", tmp_path / "workspace")
+    files = {"recipe/meta.yaml": RECIPE, "LICENSE": "license\n"}
+    for name in ("foo-feedstock", "bar-feedstock"):
+        _, bare = make_upstream(tmp_path, name, files)
+        # The fork lags upstream: it only has the first commit
+        fork = tmp_path / "me" / bare.name
+        git("init", "--quiet", "--bare", str(fork))
+        git("push", "--quiet", str(fork), "main~1:refs/heads/main", cwd=bare)
+    return tmp_path
+
+
+def count_objects(repo):
+    output = git("count-objects", "-v", cwd=repo)
+    counts = dict(line.split(": ") for line in output.splitlines())
+    return int(counts["count"]) + int(counts["in-pack"])
+
+
+def test_clone_is_partial_sparse_and_shares_objects(feedstocks):
+    foo = workspace.get_feedstock("foo", "me")
+    bar = workspace.get_feedstock("bar", "me")
+
+    for clone in (foo, bar):
+        assert sorted(os.listdir(clone)) == [".git", "recipe"]
+        assert git("rev-list", "--count", "HEAD", cwd=clone) == "2"
+        missing = git("rev-list", "--objects", "--missing=print", "HEAD", cwd=clone)
+        # Only the blob of recipe/meta.yaml was fetched
+        assert len([line for line in missing.splitlines() if line[0] == "?"]) == 2
+        assert count_objects(clone) == 1
+        git("fsck", "--connectivity-only", cwd=clone)
+    assert git("remote", "get-url", "origin", cwd=foo).endswith("/me/foo-feedstock.git")
+    # A clone is reused rather than cloned again
+    assert workspace.get_feedstock("foo", "me") == foo
+
+
+def test_clone_pulls_upstream_changes(feedstocks):
+    foo = workspace.get_feedstock("foo", "me")
+    source = feedstocks / "source" / "foo-feedstock"
+    (source / "recipe" / "meta.yaml").write_text(RECIPE.replace("1.0.0", "1.1.0"))
+    git("commit", "--quiet", "-am", "Bump", cwd=source)
+    git(
+        "push",
+        "--quiet",
+        str(feedstocks / "conda-forge" / "foo-feedstock.git"),
+        "main",
+        cwd=source,
+    )
+
+    git("pull", "--quiet", "upstream", "main", cwd=foo)
+
+    assert '"1.1.0"' in (foo / "recipe" / "meta.yaml").read_text()
+
+
+def test_missing_feedstock_raises(feedstocks):
+    with pytest.raises(RuntimeError, match="git fetch"):
+        workspace.get_feedstock("missing", "me")
+
+
+def test_pr_clones_feedstock_and_pushes_branch(
+    feedstocks, stand_in_server, pypi_client, monkeypatch
+):
+    bin_dir = feedstocks / "bin"
+    bin_dir.mkdir()
+    gh_log = feedstocks / "gh.log"
+    gh = bin_dir / "gh"
+    gh.write_text(FAKE_GH.format(python=sys.executable, log=str(gh_log)))
+    gh.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    stand_in_server.add_json("/pypi/foo/json", make_pypi_json(["1.0.0", "1.1.0"]))
+    monkeypatch.setattr(pypi_client_module, "_default_client", pypi_client)
+
+    version, sha256 = cf_release.run_cli(["pr", "foo", "--version", "1.1.0"])
+
+    fork = feedstocks / "me" / "foo-feedstock.git"
+    meta = git("show", "1.1.0:recipe/meta.yaml", cwd=fork)
+    assert version == "1.1.0"
+    assert '{% set version = "1.1.0" %}' in meta
+    assert f"sha256: {sha256}" in meta
+    assert "pr create --base main --head me:1.1.0" in gh_log.read_text()
+    state_path = get_state_path(feedstocks / "workspace" / "foo-feedstock")
+    state = json.loads(state_path.read_text())
+    assert state["open_prs"][0]["head"] == "1.1.0"
@@ -0,0 +1,199 @@
+"""
+Record where the release scripts spend their time.
+
+Wrap a phase in a span, either as a context manager or as a decorator:
+
+    with span("pypi.fetch", package=package_name) as s:
+        ...
+        s.set(status=304)
+
+    @traced("auto_api.scan")
+    def scan(...):
+        ...
+
+Set the environment variable RELEASE_SCRIPTS_TRACE to a file path, or pass
+--trace to a script that supports it, to record spans. They are written when
+the process exits, as JSON lines, or in the Chrome trace format that
+chrome://tracing and https://ui.perfetto.dev open. The format is set with
+RELEASE_SCRIPTS_TRACE_FORMAT=jsonl|chrome and otherwise follows the file
+extension: Chrome for .json, JSON lines for anything else. JSON lines are
+appended and an existing Chrome trace is extended, so every script run for a
+release can write to the same file.
+
+When tracing is off, span() returns a shared no-op object and traced()
+functions call straight through, so instrumented code pays one global lookup.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+FORMATS = ("jsonl", "chrome")
+
+
+class NullSpan:
+    """The span used when tracing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Time a block of code and record it in a Tracer."""
+
+    __slots__ = ("tracer", "name", "attrs", "start")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Add attributes known only once the span has started, e.g. a status."""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Collect the spans of a process and write them to a trace file."""
+
+    def __init__(self, path, format="jsonl"):
+        if format not in FORMATS:
+            raise ValueError(
+                f"Unknown trace format '{format}'. Expected one of: {', '.join(FORMATS)}."
+            )
+        self.path = path
+        self.format = format
+        self.pid = os.getpid()
+        self.events = []
+        self._lock = threading.Lock()
+        # Spans are timed with perf_counter and placed on the wall clock so that
+        # traces of different processes line up.
+        self._perf_origin = time.perf_counter_ns()
+        self._wall_origin = time.time_ns()
+
+    def record(self, name, start, end, attrs):
+        event = (name, start, end, threading.get_ident(), attrs)
+        with self._lock:
+            self.events.append(event)
+
+    def to_dicts(self):
+        """Return the recorded spans as JSON lines records, in seconds."""
+        return [
+            {
+                "name": name,
+                "start": (self._wall_origin + start - self._perf_origin) / 1e9,
+                "duration": (end - start) / 1e9,
+                "pid": self.pid,
+                "thread": thread,
+                "attrs": attrs,
+            }
+            for name, start, end, thread, attrs in self.events
+        ]
+
+    def to_chrome_events(self):
+        """Return the recorded spans as Chrome trace complete events."""
+        return [
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (self._wall_origin + start - self._perf_origin) / 1e3,
+                "dur": (end - start) / 1e3,
+                "pid": self.pid,
+                "tid": thread,
+                "args": attrs,
+            }
+            for name, start, end, thread, attrs in self.events
+        ]
+
+    def write(self):
+        """Append the recorded spans to the trace file."""
+        with self._lock:
+            if not self.events:
+                return
+            if self.format == "jsonl":
+                with open(self.path, "a") as file:
+                    for record in self.to_dicts():
+                        file.write(json.dumps(record, default=str) + "\n")
+            else:
+                try:
+                    with open(self.path, "r") as file:
+                        trace = json.load(file)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    trace = {"traceEvents": []}
+                trace["traceEvents"].extend(self.to_chrome_events())
+                with open(self.path, "w") as file:
+                    json.dump(trace, file, default=str)
+            self.events = []
+
+
+_tracer = None
+
+
+def enable_tracing(path, format=None):
+    """Record spans from now on and write them to path when the process exits."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.write()
+        atexit.unregister(_tracer.write)
+    format = format or os.environ.get("RELEASE_SCRIPTS_TRACE_FORMAT")
+    if not format:
+        format = "chrome" if str(path).endswith(".json") else "jsonl"
+    _tracer = Tracer(path, format)
+    atexit.register(_tracer.write)
+    return _tracer
+
+
+def span(name, /, **attrs):
+    """Return a context manager timing the enclosed block as a span."""
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, attrs)
+
+
+def traced(name=None):
+    """Decorate a function so that every call is recorded as a span."""
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with Span(_tracer, span_name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+if os.environ.get("RELEASE_SCRIPTS_TRACE"):
+    enable_tracing(os.environ["RELEASE_SCRIPTS_TRACE"])
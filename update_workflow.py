@@ -8,49 +8,68 @@ packages using the following command:
     conda install requests
 
 This script assumes the package repository has the same parent directory as 'release-scripts'.
-You can change this by modifying the 'LOCAL_WORKFLOW_DIR' variable.
+You can change this by modifying 'local_workflow_dir' in main().
 
-Sometimes there would be timeout errors while fetching the workflows from the central repository.
-In such cases, you can try running the script again.
+The workflows are downloaded concurrently and retried with backoff on timeouts. They are
+cached together with their ETags, so unchanged workflows are not downloaded again and the
+cached workflows are used when the central repository cannot be reached.
+
+Workflows whose rendered content is unchanged are not rewritten, and changed workflows are
+written atomically. Pass --check to only print a diff of the workflows that are out of date;
+the script then exits with status 1 if there is any, which makes it a cheap drift check in CI.
+
+To keep many repositories on the same templates, run the script in fleet mode:
+
+    python update_workflow.py --fleet ../diffpy.utils ../diffpy.structure ...
+
+The central workflows are then fetched once and every repository is updated in parallel
+without prompting. The parameters of each repository are read from the JSON file
+'.github/workflow-params.json' inside it (change it with --params-file), e.g.
+
+    {"PROJECT": "diffpy.utils", "C_EXTENSION": "false"}
+
+'PROJECT' defaults to the name of the repository directory, and any other parameter
+missing from the file keeps the default value written in the template.
 """
 
+import argparse
+import difflib
+import hashlib
+import json
 import os
-import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import requests
-
-proj = (
-    input(f"Enter value for 'PROJECT' (default: {'PROJECT_NAME'}): ").strip()
-    or "PROJECT_NAME"
+from fsutils import atomic_write
+from tracing import enable_tracing, span
+from workflow_fetcher import fetch_central_workflows
+from workflow_template import (
+    collect_params,
+    parse_template,
+    parse_templates,
+    render_template,
 )
 
 pwd = os.path.dirname(__file__)
 
-CENTRAL_REPO_ORG = "scikit-package"
-CENTRAL_REPO_NAME = "release-scripts"
-CENTRAL_WORKFLOW_DIR = ".github/workflows/templates"
-LOCAL_WORKFLOW_DIR = Path(pwd + "/../" + proj + "/.github/workflows")
+DEFAULT_PARAMS_FILE = ".github/workflow-params.json"
 
-user_input_cache = {"PROJECT": proj}
+user_input_cache = {}
 
 
 def get_central_workflows():
-    base_url = (
-        f"https://api.github.com/repos/{CENTRAL_REPO_ORG}/"
-        f"{CENTRAL_REPO_NAME}/contents/{CENTRAL_WORKFLOW_DIR}"
-    )
-    response = requests.get(base_url, timeout=5)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch central workflows: {response.status_code}")
+    return fetch_central_workflows()
+
 
-    workflows = {}
-    for file in response.json():
-        if file["type"] == "file" and file["name"].endswith(".yml"):
-            content_response = requests.get(file["download_url"], timeout=5)
-            if content_response.status_code == 200:
-                workflows[file["name"]] = content_response.text
-    return workflows
+def normalize_param_value(value):
+    """Return a parameter value as written in a workflow, e.g. 'false' for False."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    value = str(value)
+    if value.lower() in ("true", "false"):
+        return value.lower()
+    return value
 
 
 def get_user_input(prompt, default, param_name):
@@ -58,58 +77,247 @@ def get_user_input(prompt, default, param_name):
         return user_input_cache[param_name]
 
     user_value = input(f"{prompt} (default: {default}): ").strip()
-    if user_value.lower() == "false":
-        value = "false"
-    elif user_value.lower() == "true":
-        value = "true"
-    elif user_value:
-        value = user_value
-    else:
-        value = default
+    value = normalize_param_value(user_value) if user_value else default
 
     user_input_cache[param_name] = value
     return value
 
 
-def update_workflow_params(content):
+def resolve_params(param_defaults, params=None):
+    """
+    Resolve the value of every template parameter up front.
+
+    If ``params`` is None, the values are asked interactively and kept in
+    user_input_cache. Otherwise values are taken from ``params`` and missing
+    keys keep their default value.
+    """
+    if params is None:
+        return {
+            key: get_user_input(f"Enter value for '{key}'", default, key)
+            for key, default in param_defaults.items()
+        }
+    return {key: params.get(key, default) for key, default in param_defaults.items()}
+
+
+def update_workflow_params(content, params=None):
+    """Fill in the {{ KEY / default }} parameters of a workflow template."""
+    segments = parse_template(content)
+    values = resolve_params(collect_params({"": segments}), params)
+    return render_template(segments, values)
+
+
+def get_digest(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def update_local_workflows(
+    parsed_workflows, local_workflow_dir, params=None, check=False
+):
+    """
+    Render the parsed workflows into local_workflow_dir.
+
+    All parameters are resolved before any workflow is written. A workflow is
+    only rewritten, atomically, when the hash of its rendered content differs
+    from the local file, and workflows that no longer exist centrally are
+    removed. With ``check`` the local files are left untouched.
 
-    def replace_match(match):
-        key = match.group(1)
-        default_value = match.group(2)
-        if key not in user_input_cache:
-            user_value = get_user_input(f"Enter value for '{key}'", default_value, key)
-            user_input_cache[key] = user_value
-        return str(user_input_cache[key])
+    Return a dictionary mapping each changed file name to its (old, new)
+    content, where None stands for a missing file.
+    """
+    local_workflows = set(f.name for f in local_workflow_dir.glob("*.yml"))
+    central_workflow_names = set(parsed_workflows.keys())
+    values = resolve_params(collect_params(parsed_workflows), params)
+    changes = {}
 
-    pattern = re.compile(r"\{\{\s*(\w+)\s*/\s*([^\s\}]+)\s*\}\}")
-    return pattern.sub(replace_match, content)
+    for name, segments in parsed_workflows.items():
+        local_file = local_workflow_dir / name
 
+        content = render_template(segments, values)
 
-def update_local_workflows(central_workflows):
-    local_workflows = set(f.name for f in LOCAL_WORKFLOW_DIR.glob("*.yml"))
-    central_workflow_names = set(central_workflows.keys())
+        old_content = None
+        if name in local_workflows:
+            old_content = local_file.read_text("utf-8")
+            if get_digest(old_content) == get_digest(content):
+                continue
+        changes[name] = (old_content, content)
 
-    for name, content in central_workflows.items():
-        local_file = LOCAL_WORKFLOW_DIR / name
+        if not check:
+            with span("workflow.write", name=name):
+                atomic_write(local_file, content)
 
-        content = update_workflow_params(content)
+    for name in sorted(local_workflows - central_workflow_names):
+        changes[name] = ((local_workflow_dir / name).read_text("utf-8"), None)
+        if not check:
+            (local_workflow_dir / name).unlink()
+            print(f"Removed workflow {name}")
 
-        with open(local_file, "w", encoding="utf-8") as file:
-            file.write(content)
+    return changes
 
-    for name in local_workflows - central_workflow_names:
-        (LOCAL_WORKFLOW_DIR / name).unlink()
-        print(f"Removed workflow {name}")
+
+def format_changes(local_workflow_dir, changes):
+    """Return a unified diff of the workflow changes."""
+    diffs = []
+    for name, (old_content, new_content) in sorted(changes.items()):
+        path = str(local_workflow_dir / name)
+        diffs.extend(
+            difflib.unified_diff(
+                (old_content or "").splitlines(keepends=True),
+                (new_content or "").splitlines(keepends=True),
+                fromfile=path if old_content is not None else "/dev/null",
+                tofile=path if new_content is not None else "/dev/null",
+            )
+        )
+    return "".join(diffs)
+
+
+def read_repo_params(repo_path, params_file=DEFAULT_PARAMS_FILE):
+    """
+    Read the workflow parameters of a repository from its parameter file.
+
+    JSON values are written the way the interactive prompts write them, so
+    false becomes 'false' and 3 becomes '3'. A null value keeps the default.
+    """
+    params = {"PROJECT": repo_path.resolve().name}
+    params_path = repo_path / params_file
+    if params_path.exists():
+        with open(params_path, "r", encoding="utf-8") as file:
+            params.update(
+                (key, normalize_param_value(value))
+                for key, value in json.load(file).items()
+                if value is not None
+            )
+    return params
+
+
+def sync_repo(
+    parsed_workflows, repo_path, params_file=DEFAULT_PARAMS_FILE, check=False
+):
+    """Update the workflows of one repository and return its changes."""
+    if not repo_path.is_dir():
+        raise FileNotFoundError(f"{repo_path} is not a directory")
+    local_workflow_dir = repo_path / ".github" / "workflows"
+    if not check:
+        local_workflow_dir.mkdir(parents=True, exist_ok=True)
+    params = read_repo_params(repo_path, params_file)
+    with span("workflow.sync", repo=str(repo_path)):
+        return update_local_workflows(
+            parsed_workflows, local_workflow_dir, params, check=check
+        )
+
+
+def sync_fleet(repo_paths, params_file=DEFAULT_PARAMS_FILE, max_workers=8, check=False):
+    """
+    Update the workflows of many repositories from a single fetch.
+
+    Return a dictionary mapping each repository path to its changes, as
+    returned by update_local_workflows(), or to the exception raised while
+    updating it. With ``check`` no file is modified.
+    """
+    parsed_workflows = parse_templates(get_central_workflows())
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            repo_path: executor.submit(
+                sync_repo, parsed_workflows, repo_path, params_file, check
+            )
+            for repo_path in repo_paths
+        }
+        for repo_path, future in futures.items():
+            try:
+                results[repo_path] = future.result()
+            except Exception as e:
+                results[repo_path] = e
+    return results
+
+
+def print_fleet_report(results, check=False):
+    for repo_path, result in results.items():
+        if isinstance(result, Exception):
+            print(f"{repo_path}: error: {result}")
+        elif result:
+            verb = "out of date" if check else "changed"
+            print(f"{repo_path}: {verb} {', '.join(sorted(result))}")
+            if check:
+                print(format_changes(repo_path / ".github" / "workflows", result))
+        else:
+            print(f"{repo_path}: up to date")
+    changed = [
+        path
+        for path, result in results.items()
+        if result and not isinstance(result, Exception)
+    ]
+    verb = "are out of date" if check else "changed"
+    print(f"{len(changed)} of {len(results)} repositories {verb}")
+
+
+def create_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Update the local workflows from the central 'release-scripts' templates."
+    )
+    parser.add_argument(
+        "--fleet",
+        nargs="+",
+        type=Path,
+        metavar="REPO",
+        help="Update the workflows of these repositories without prompting.",
+    )
+    parser.add_argument(
+        "--params-file",
+        default=DEFAULT_PARAMS_FILE,
+        help="Path of the JSON parameter file inside each repository in fleet mode "
+        f"(default: {DEFAULT_PARAMS_FILE}).",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Print a diff of the workflows that are out of date without modifying "
+        "any file, and exit with status 1 if there is any.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record timing spans to PATH (see tracing.py).",
+    )
+    return parser
 
 
 def main():
+    args = create_argument_parser().parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
     try:
-        LOCAL_WORKFLOW_DIR.mkdir(parents=True, exist_ok=True)
-        central_workflows = get_central_workflows()
-        update_local_workflows(central_workflows)
-        print("Workflow synchronization completed successfully")
+        if args.fleet:
+            results = sync_fleet(args.fleet, args.params_file, check=args.check)
+            print_fleet_report(results, check=args.check)
+            out_of_date = any(results.values())
+        else:
+            proj = (
+                input(
+                    f"Enter value for 'PROJECT' (default: {'PROJECT_NAME'}): "
+                ).strip()
+                or "PROJECT_NAME"
+            )
+            user_input_cache["PROJECT"] = proj
+            local_workflow_dir = Path(pwd + "/../" + proj + "/.github/workflows")
+            if not args.check:
+                local_workflow_dir.mkdir(parents=True, exist_ok=True)
+            parsed_workflows = parse_templates(get_central_workflows())
+            changes = update_local_workflows(
+                parsed_workflows, local_workflow_dir, check=args.check
+            )
+            out_of_date = bool(changes)
+            if args.check:
+                print(format_changes(local_workflow_dir, changes) or "Up to date")
+            else:
+                print(
+                    f"Workflow synchronization completed successfully "
+                    f"({len(changes)} workflows changed)"
+                )
     except Exception as e:
         print(f"Error: {str(e)}")
+        out_of_date = True
+    if args.check and out_of_date:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,490 @@
+#!/usr/bin/env python
+
+"""
+Watch PyPI for new releases and queue the feedstock bumps they need.
+
+A set of packages is polled in one long-running process. Every poll is a
+conditional request through the shared PyPIClient (see pypi_client.py), so a
+package that did not change on PyPI costs a 304 with no body. When its ETag
+changes, the latest sdist is read from the cached JSON and compared with the
+version of the feedstock recipe on conda-forge, which is fetched the same way
+from FEEDSTOCK_RECIPE_URL. A newer PyPI version adds a bump job to a local
+SQLite queue, where a package and version pair is only ever queued once.
+Pre-releases are ignored unless --pre is given; their jobs are then listed
+separately with `jobs --manifest --release-type pre-release`.
+
+The packages given to `watch` replace the watched set, so a package removed
+from the packages file is no longer polled. Run `watch` without packages to
+keep polling the current set.
+
+Each package is polled on its own interval: it is reset to --min-interval
+when the package changes and doubled up to --max-interval while it does not,
+with random jitter so that the packages do not come due at the same time.
+All polls share one pooled HTTP session and a small thread pool.
+
+Set PYPI_BASE_URL and FEEDSTOCK_RECIPE_URL to test against a local stand-in
+server, e.g. FEEDSTOCK_RECIPE_URL=http://127.0.0.1:8000/{feedstock}/meta.yaml.
+
+Before running the script, install the required packages using the following
+command:
+
+    conda install requests packaging
+
+How to use:
+
+python /path/.../version_watch.py watch diffpy.pdfgui diffpy.structure
+python /path/.../version_watch.py watch --packages-file packages.txt --once
+python /path/.../version_watch.py jobs [--status queued] [--manifest [--release-type pre-release]]
+python /path/.../version_watch.py done diffpy.pdfgui 1.2.0 [--failed]
+
+`jobs --manifest` prints the queued bumps as <package>==<version> lines that
+`cf_release.py batch` reads, with the matching --release-type.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from packaging.version import InvalidVersion, Version
+
+from http_cache import DEFAULT_CACHE_DIR, cached_get
+from tracing import enable_tracing, span
+
+DEFAULT_DB_PATH = DEFAULT_CACHE_DIR / "version-watch.sqlite3"
+DEFAULT_RECIPE_URL = (
+    "https://raw.githubusercontent.com/conda-forge/{feedstock}/main/recipe/meta.yaml"
+)
+JOB_STATUSES = ("queued", "done", "failed", "superseded")
+RELEASE_TYPES = ("release", "pre-release")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    etag TEXT,
+    pypi_version TEXT,
+    feedstock_version TEXT,
+    interval REAL NOT NULL,
+    next_check REAL NOT NULL,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    feedstock_version TEXT,
+    release_type TEXT NOT NULL DEFAULT 'release',
+    status TEXT NOT NULL DEFAULT 'queued',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (package, version)
+);
+"""
+
+
+def connect(db_path=None):
+    """Open the watch database, creating its tables if needed."""
+    db_path = db_path or DEFAULT_DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def set_packages(connection, package_names, min_interval):
+    """
+    Make package_names the watched set.
+
+    New packages are due right away, packages already watched keep their
+    schedule and packages that are no longer listed are dropped. Their jobs
+    stay in the queue.
+    """
+    now = time.time()
+    package_names = list(dict.fromkeys(package_names))
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS watched (name TEXT)")
+    connection.execute("DELETE FROM watched")
+    connection.executemany(
+        "INSERT INTO watched (name) VALUES (?)", [(name,) for name in package_names]
+    )
+    removed = connection.execute(
+        "DELETE FROM packages WHERE name NOT IN (SELECT name FROM watched)"
+    ).rowcount
+    connection.executemany(
+        "INSERT OR IGNORE INTO packages (name, interval, next_check) VALUES (?, ?, ?)",
+        [(name, min_interval, now) for name in package_names],
+    )
+    connection.commit()
+    return removed
+
+
+def get_recipe_url(package_name):
+    url = os.environ.get("FEEDSTOCK_RECIPE_URL", DEFAULT_RECIPE_URL)
+    return url.format(feedstock=f"{package_name}-feedstock")
+
+
+def fetch_feedstock_version(client, package_name):
+    """Return the version of the feedstock recipe, or None if it is not found."""
+    from recipe_editor import read_recipe
+
+    meta = cached_get(
+        client.session,
+        client.cache,
+        get_recipe_url(package_name),
+        timeout=client.timeout,
+        force_revalidate=True,
+    )
+    if meta is None:
+        return None
+    version, _ = read_recipe(meta["body_path"])
+    return version
+
+
+def is_prerelease(version):
+    try:
+        return Version(version).is_prerelease
+    except InvalidVersion:
+        return False
+
+
+def is_newer(version, feedstock_version):
+    """Return True if version is newer than the recipe version under PEP 440."""
+    if feedstock_version is None:
+        return False
+    try:
+        return Version(version) > Version(feedstock_version)
+    except InvalidVersion:
+        return version != feedstock_version
+
+
+def poll_package(client, package_name, etag, pre=False):
+    """
+    Revalidate a package on PyPI and return what changed.
+
+    The result holds the package's ``etag`` and whether it ``changed`` since
+    ``etag``. For a changed package, it also holds the latest ``version`` and
+    ``sha256`` on PyPI and the ``feedstock_version`` of its recipe. The
+    latest version is a final release unless ``pre`` is True. ``version`` is
+    None when the package has no matching sdist.
+    """
+    from pypi_client import iter_sdist_releases, select_latest_sdists
+
+    with span("watch.poll", package=package_name) as s:
+        meta = client.get_project_entry(package_name, force_revalidate=True)
+        if meta is None:
+            raise ValueError(f"{package_name} was not found on PyPI.")
+        result = {"etag": meta.get("etag"), "changed": True}
+        if etag is not None and result["etag"] == etag:
+            result["changed"] = False
+            s.set(changed=False)
+            return result
+        # The metadata was just revalidated, so the cached JSON is read as is
+        with open(meta["body_path"], "rb") as file:
+            releases = select_latest_sdists(
+                (
+                    release
+                    for release in iter_sdist_releases(file)
+                    if pre or not is_prerelease(release[0])
+                ),
+                1,
+            )
+        if not releases:
+            result.update(version=None, sha256=None, feedstock_version=None)
+            return result
+        result["version"] = releases[0]["version"]
+        result["sha256"] = releases[0]["sha256"]
+        result["feedstock_version"] = fetch_feedstock_version(client, package_name)
+        s.set(changed=True, version=result["version"])
+        return result
+
+
+def get_next_interval(interval, changed, min_interval, max_interval):
+    """Reset the interval when the package changed and back off otherwise."""
+    if changed:
+        return min_interval
+    return min(interval * 2, max_interval)
+
+
+def queue_job(connection, package_name, result):
+    """
+    Queue a bump job and supersede older queued jobs of the package.
+
+    A release supersedes every queued job, while a pre-release only
+    supersedes queued pre-releases.
+    """
+    now = time.time()
+    release_type = "pre-release" if is_prerelease(result["version"]) else "release"
+    cursor = connection.execute(
+        "INSERT OR IGNORE INTO jobs "
+        "(package, version, sha256, feedstock_version, release_type, created_at, "
+        "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            package_name,
+            result["version"],
+            result["sha256"],
+            result["feedstock_version"],
+            release_type,
+            now,
+            now,
+        ),
+    )
+    if cursor.rowcount:
+        connection.execute(
+            "UPDATE jobs SET status = 'superseded', updated_at = ? "
+            "WHERE package = ? AND status = 'queued' AND version != ? "
+            "AND (release_type = 'pre-release' OR ? = 'release')",
+            (now, package_name, result["version"], release_type),
+        )
+    return bool(cursor.rowcount)
+
+
+def record_poll(connection, row, result, error, intervals, jitter):
+    """Store the outcome of a poll, schedule the next one and queue any bump."""
+    min_interval, max_interval = intervals
+    changed = error is None and result["changed"]
+    interval = get_next_interval(row["interval"], changed, min_interval, max_interval)
+    next_check = time.time() + interval * random.uniform(1 - jitter, 1 + jitter)
+    if error is not None:
+        connection.execute(
+            "UPDATE packages SET interval = ?, next_check = ?, last_error = ? "
+            "WHERE name = ?",
+            (interval, next_check, error, row["name"]),
+        )
+        return None
+    connection.execute(
+        "UPDATE packages SET etag = ?, interval = ?, next_check = ?, last_error = NULL "
+        "WHERE name = ?",
+        (result["etag"], interval, next_check, row["name"]),
+    )
+    if not changed:
+        return None
+    connection.execute(
+        "UPDATE packages SET pypi_version = ?, feedstock_version = ? WHERE name = ?",
+        (result["version"], result["feedstock_version"], row["name"]),
+    )
+    if result["version"] is not None and is_newer(
+        result["version"], result["feedstock_version"]
+    ):
+        if queue_job(connection, row["name"], result):
+            return result["version"]
+    return None
+
+
+def run_due_polls(connection, client, intervals, jitter=0.1, workers=8, pre=False):
+    """
+    Poll every package that is due on a shared thread pool.
+
+    Return the (package, version) pairs of the newly queued jobs.
+    """
+    rows = connection.execute(
+        "SELECT * FROM packages WHERE next_check <= ? ORDER BY next_check",
+        (time.time(),),
+    ).fetchall()
+    if not rows:
+        return []
+
+    def poll(row):
+        try:
+            return poll_package(client, row["name"], row["etag"], pre), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+    queued = []
+    with ThreadPoolExecutor(max_workers=min(workers, len(rows))) as executor:
+        for row, (result, error) in zip(rows, executor.map(poll, rows)):
+            if error is not None:
+                print(f"{row['name']}: {error}", file=sys.stderr)
+            version = record_poll(connection, row, result, error, intervals, jitter)
+            if version is not None:
+                print(f"Queued {row['name']} {version}")
+                queued.append((row["name"], version))
+    connection.commit()
+    return queued
+
+
+def get_seconds_until_due(connection):
+    """Return the seconds until the next package is due, or None if none is watched."""
+    row = connection.execute("SELECT MIN(next_check) FROM packages").fetchone()
+    if row[0] is None:
+        return None
+    return max(0.0, row[0] - time.time())
+
+
+def watch(connection, client, intervals, jitter=0.1, workers=8, once=False, pre=False):
+    """Poll the watched packages until interrupted, or once with once=True."""
+    while True:
+        run_due_polls(connection, client, intervals, jitter, workers, pre)
+        if once:
+            return
+        delay = get_seconds_until_due(connection)
+        if delay is None:
+            return
+        time.sleep(min(delay, intervals[1]))
+
+
+def get_jobs(connection, status=None, release_type=None):
+    """Return the jobs in the queue, optionally filtered by status and release type."""
+    conditions = []
+    parameters = []
+    if status:
+        conditions.append("status = ?")
+        parameters.append(status)
+    if release_type:
+        conditions.append("release_type = ?")
+        parameters.append(release_type)
+    query = "SELECT * FROM jobs"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return connection.execute(query + " ORDER BY created_at", parameters).fetchall()
+
+
+def set_job_status(connection, package_name, version, status):
+    """Set the status of a job after its bump was attempted."""
+    cursor = connection.execute(
+        "UPDATE jobs SET status = ?, updated_at = ? WHERE package = ? AND version = ?",
+        (status, time.time(), package_name, version),
+    )
+    connection.commit()
+    if not cursor.rowcount:
+        raise ValueError(f"No job found for {package_name} {version}.")
+
+
+def print_jobs(jobs):
+    if not jobs:
+        print("No jobs found.")
+        return
+    print(f"{'Package':<30} {'Version':<12} {'Feedstock':<12} {'Type':<12} Status")
+    for job in jobs:
+        print(
+            f"{job['package']:<30} {job['version']:<12} "
+            f"{job['feedstock_version'] or '-':<12} {job['release_type']:<12} "
+            f"{job['status']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch PyPI for new releases and queue feedstock bumps."
+    )
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_PATH,
+        help=f"SQLite database of the watch (default: {DEFAULT_DB_PATH}).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    watch_parser = subparsers.add_parser("watch", help="Poll PyPI for new releases.")
+    watch_parser.add_argument(
+        "package_names",
+        nargs="*",
+        metavar="package_name",
+        help="Packages to watch, replacing the watched set (default: keep the set).",
+    )
+    watch_parser.add_argument(
+        "--packages-file",
+        help="Manifest with one package per line, as read by cf_release.py batch.",
+    )
+    watch_parser.add_argument(
+        "--pre", action="store_true", help="Also queue bumps to pre-releases."
+    )
+    watch_parser.add_argument(
+        "--min-interval", type=float, default=300, help="Seconds (default: 300)."
+    )
+    watch_parser.add_argument(
+        "--max-interval", type=float, default=21600, help="Seconds (default: 21600)."
+    )
+    watch_parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.1,
+        help="Random fraction added to or removed from each interval (default: 0.1).",
+    )
+    watch_parser.add_argument(
+        "--workers", type=int, default=8, help="Concurrent polls (default: 8)."
+    )
+    watch_parser.add_argument(
+        "--once", action="store_true", help="Poll the due packages once and exit."
+    )
+    watch_parser.add_argument(
+        "--trace", metavar="PATH", help="Record timing spans to PATH."
+    )
+
+    jobs_parser = subparsers.add_parser("jobs", help="List the queued bump jobs.")
+    jobs_parser.add_argument("--status", choices=JOB_STATUSES)
+    jobs_parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help="Print queued jobs as <package>==<version> lines for cf_release.py batch.",
+    )
+    jobs_parser.add_argument(
+        "--release-type",
+        choices=RELEASE_TYPES,
+        help="Only list jobs of this release type (default with --manifest: release).",
+    )
+
+    done_parser = subparsers.add_parser("done", help="Mark a job as done.")
+    done_parser.add_argument("package_name")
+    done_parser.add_argument("version")
+    done_parser.add_argument(
+        "--failed", action="store_true", help="Mark the job as failed instead."
+    )
+
+    args = parser.parse_args()
+    connection = connect(args.db)
+
+    if args.command == "watch":
+        if args.trace:
+            enable_tracing(args.trace)
+        package_names = list(args.package_names)
+        if args.packages_file:
+            from cf_release import read_batch_manifest
+
+            try:
+                packages = read_batch_manifest(args.packages_file)
+            except ValueError as e:
+                parser.error(str(e))
+            package_names += [name for name, _ in packages]
+        if args.min_interval <= 0 or args.max_interval < args.min_interval:
+            parser.error("Expected 0 < --min-interval <= --max-interval.")
+        if not 0 <= args.jitter < 1:
+            parser.error("--jitter must be between 0 and 1.")
+        if package_names:
+            removed = set_packages(connection, package_names, args.min_interval)
+            if removed:
+                print(f"Stopped watching {removed} package(s) no longer listed.")
+
+        from pypi_client import get_default_client
+
+        try:
+            watch(
+                connection,
+                get_default_client(),
+                (args.min_interval, args.max_interval),
+                args.jitter,
+                args.workers,
+                args.once,
+                args.pre,
+            )
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+    elif args.command == "jobs":
+        if args.manifest:
+            release_type = args.release_type or "release"
+            for job in get_jobs(connection, "queued", release_type):
+                print(f"{job['package']}=={job['version']}")
+        else:
+            print_jobs(get_jobs(connection, args.status, args.release_type))
+    else:
+        status = "failed" if args.failed else "done"
+        try:
+            set_job_status(connection, args.package_name, args.version, status)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+
+
+if __name__ == "__main__":
+    main()
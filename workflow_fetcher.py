@@ -0,0 +1,85 @@
+"""
+Fetch the central workflow templates of 'release-scripts'.
+
+The template directory is listed through the GitHub contents API and every
+template is then downloaded concurrently over one pooled session. Failed
+requests are retried with exponential backoff. Responses are kept in the
+on-disk cache from http_cache.py together with their ETags, so unchanged
+templates come back as 304 Not Modified, and the cached templates are used
+when GitHub cannot be reached.
+
+Set the environment variable WORKFLOW_TEMPLATES_URL to list the templates
+from a different contents API URL, e.g. a local stand-in server.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from http_cache import DiskCache, cached_get, create_session
+from tracing import span
+
+CENTRAL_REPO_ORG = "scikit-package"
+CENTRAL_REPO_NAME = "release-scripts"
+CENTRAL_WORKFLOW_DIR = ".github/workflows/templates"
+DEFAULT_CONTENTS_URL = (
+    f"https://api.github.com/repos/{CENTRAL_REPO_ORG}/"
+    f"{CENTRAL_REPO_NAME}/contents/{CENTRAL_WORKFLOW_DIR}"
+)
+
+
+def get_with_cache_fallback(session, cache, url, timeout, offline=False):
+    """
+    Return the body of url and whether it came from the cache after a failure.
+
+    The cached copy is revalidated with its ETag. If the request fails, or
+    ``offline`` is True, the cached copy is returned regardless of its age.
+    """
+    fell_back = offline
+    try:
+        if offline:
+            meta = cache.get(url)
+        else:
+            meta = cached_get(session, cache, url, timeout=timeout)
+    except OSError as e:
+        # requests' exceptions derive from OSError
+        meta = cache.get(url)
+        if meta is None:
+            raise
+        print(f"Using cached copy of {url} ({e.__class__.__name__})")
+        fell_back = True
+    if meta is None:
+        raise FileNotFoundError(f"{url} was not found")
+    return cache.read(meta), fell_back
+
+
+def fetch_central_workflows(
+    contents_url=None, cache=None, session=None, max_workers=8, timeout=5
+):
+    """Return the central workflow templates as a {file name: content} dictionary."""
+    contents_url = (
+        contents_url or os.environ.get("WORKFLOW_TEMPLATES_URL") or DEFAULT_CONTENTS_URL
+    )
+    # Always revalidate: an unchanged template costs a 304 without a body
+    cache = cache or DiskCache(ttl=0)
+    session = session or create_session(pool_size=max_workers)
+
+    body, offline = get_with_cache_fallback(session, cache, contents_url, timeout)
+    listing = json.loads(body)
+    files = [
+        file
+        for file in listing
+        if file["type"] == "file" and file["name"].endswith(".yml")
+    ]
+
+    def fetch(file):
+        # When GitHub could not be reached for the listing, skip the network
+        # and read every template from the cache.
+        with span("workflow.template", name=file["name"]):
+            body, _ = get_with_cache_fallback(
+                session, cache, file["download_url"], timeout, offline
+            )
+        return file["name"], body.decode("utf-8")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(fetch, files))
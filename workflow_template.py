@@ -0,0 +1,83 @@
+"""
+Parse and render the central workflow templates.
+
+A template is parsed once into a list of segments: literal strings and
+[KEY, default] lists for every {{ KEY / default }} placeholder. The parsed
+form is plain JSON, so it is cached on disk keyed by the SHA256 of the
+template and repeated syncs skip parsing. Rendering a template for a
+repository is then a single join over its segments.
+"""
+
+import hashlib
+import json
+import re
+
+from fsutils import atomic_write
+from http_cache import DEFAULT_CACHE_DIR
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*/\s*([^\s\}]+)\s*\}\}")
+DEFAULT_PARSED_CACHE_PATH = DEFAULT_CACHE_DIR / "parsed-templates.json"
+
+
+def parse_template(content):
+    """Split a template into literal strings and [KEY, default] placeholders."""
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(content):
+        if match.start() > position:
+            segments.append(content[position : match.start()])
+        segments.append([match.group(1), match.group(2)])
+        position = match.end()
+    if position < len(content):
+        segments.append(content[position:])
+    return segments
+
+
+def parse_templates(templates, cache_path=DEFAULT_PARSED_CACHE_PATH):
+    """
+    Parse many templates, reusing the parsed forms cached on disk.
+
+    ``templates`` maps each file name to its content. Return a dictionary
+    mapping each file name to its segments. Pass ``cache_path=None`` to
+    disable the on-disk cache.
+    """
+    cache = {}
+    if cache_path is not None:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            cache = {}
+
+    parsed = {}
+    used = {}
+    for name, content in templates.items():
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        segments = cache.get(digest)
+        if segments is None:
+            segments = parse_template(content)
+        parsed[name] = used[digest] = segments
+
+    # Only rewrite the cache when templates were added or removed
+    if cache_path is not None and used.keys() != cache.keys():
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_path, json.dumps(used))
+    return parsed
+
+
+def collect_params(parsed_templates):
+    """Return every parameter used by the templates with its first default value."""
+    params = {}
+    for segments in parsed_templates.values():
+        for segment in segments:
+            if isinstance(segment, list):
+                params.setdefault(segment[0], segment[1])
+    return params
+
+
+def render_template(segments, values):
+    """Render parsed segments with the resolved parameter values."""
+    return "".join(
+        segment if isinstance(segment, str) else str(values[segment[0]])
+        for segment in segments
+    )
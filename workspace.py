@@ -0,0 +1,175 @@
+"""
+Managed feedstock clones for cf_release.py.
+
+When a feedstock is not checked out next to release-scripts, cf_release.py
+clones it into a reusable workspace directory instead. The clones are partial
+(commits and trees only, blobs are fetched when first needed) and sparse (only
+recipe/ is checked out), so a new machine or CI runner downloads the files of
+recipe/ and nothing else. Unlike a shallow clone, a partial clone keeps the
+full history of main, so a branch can be pushed to a fork that lags behind
+upstream.
+
+The workspace holds one bare repository, objects.git, that every feedstock is
+first fetched into. Each clone lists objects.git in its git alternates before
+fetching, so the fetch finds every commit and tree already present and
+transfers nothing: the objects are borrowed rather than copied, and trees
+shared across feedstocks are stored once. objects.git keeps a remote and a ref
+for every feedstock so that the borrowed objects are never pruned.
+
+Set RELEASE_SCRIPTS_WORKSPACE to use another workspace directory. The remote
+URLs are built from FEEDSTOCK_UPSTREAM_URL and FEEDSTOCK_ORIGIN_URL, e.g.
+FEEDSTOCK_UPSTREAM_URL=file:///srv/git/{feedstock}.git to clone local bare
+repositories. Use file:// URLs for local repositories, as git ignores --filter
+for plain paths.
+
+How to use:
+
+python /path/.../workspace.py <package_name> [<package_name> ...] --username NAME
+"""
+
+import argparse
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from command_runner import run_argv
+from http_cache import DEFAULT_CACHE_DIR
+from tracing import span
+
+DEFAULT_WORKSPACE_DIR = Path(
+    os.environ.get("RELEASE_SCRIPTS_WORKSPACE", DEFAULT_CACHE_DIR / "workspace")
+)
+DEFAULT_UPSTREAM_URL = "https://github.com/conda-forge/{feedstock}.git"
+DEFAULT_ORIGIN_URL = "https://github.com/{username}/{feedstock}.git"
+SPARSE_PATTERN = "/recipe/"
+PARTIAL_CLONE_FILTER = "blob:none"
+
+# Fetches into the shared object store must not run concurrently
+_object_store_lock = threading.Lock()
+
+
+def git(*args, cwd=None, retries=0):
+    """Run a git command and return its stdout, raising RuntimeError on failure."""
+    result = run_argv(["git", *args], cwd=cwd, retries=retries)
+    if result["returncode"] != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result['stderr'].strip()}")
+    return result["stdout"].strip()
+
+
+def get_remote_urls(package_name, username):
+    """Return the upstream and origin URLs of a feedstock."""
+    feedstock = f"{package_name}-feedstock"
+    upstream_url = os.environ.get("FEEDSTOCK_UPSTREAM_URL", DEFAULT_UPSTREAM_URL)
+    origin_url = os.environ.get("FEEDSTOCK_ORIGIN_URL", DEFAULT_ORIGIN_URL)
+    return (
+        upstream_url.format(feedstock=feedstock, username=username),
+        origin_url.format(feedstock=feedstock, username=username),
+    )
+
+
+def get_object_store(workspace_dir=None):
+    """Return the shared bare repository of the workspace, creating it if needed."""
+    object_store = Path(workspace_dir or DEFAULT_WORKSPACE_DIR) / "objects.git"
+    if not (object_store / "HEAD").exists():
+        object_store.parent.mkdir(parents=True, exist_ok=True)
+        git("init", "--quiet", "--bare", str(object_store))
+    return object_store
+
+
+def is_clone(path):
+    """Return True if path is a usable feedstock clone."""
+    return (path / ".git").is_dir() and (path / "recipe" / "meta.yaml").exists()
+
+
+def clone_feedstock(package_name, username, workspace_dir=None):
+    """
+    Create a partial, sparse clone of a feedstock in the workspace.
+
+    The commits and trees of the feedstock are fetched into the shared object
+    store first, and the clone borrows them from there through git alternates.
+    Return the path of the clone.
+    """
+    workspace_dir = Path(workspace_dir or DEFAULT_WORKSPACE_DIR)
+    feedstock_dir = workspace_dir / f"{package_name}-feedstock"
+    upstream_url, origin_url = get_remote_urls(package_name, username)
+    object_store = get_object_store(workspace_dir)
+
+    with span("workspace.clone", package=package_name):
+        with _object_store_lock:
+            remote = f"feedstocks/{package_name}"
+            # A named remote (rather than a URL) can be recorded as promisor
+            git("config", f"remote.{remote}.url", upstream_url, cwd=object_store)
+            git(
+                "fetch",
+                "--quiet",
+                f"--filter={PARTIAL_CLONE_FILTER}",
+                remote,
+                f"+refs/heads/main:refs/feedstocks/{package_name}/main",
+                cwd=object_store,
+                retries=2,
+            )
+
+        # A leftover directory from an interrupted clone is started over
+        shutil.rmtree(feedstock_dir, ignore_errors=True)
+        git("init", "--quiet", str(feedstock_dir))
+        (feedstock_dir / ".git" / "objects" / "info" / "alternates").write_text(
+            f"{(object_store / 'objects').resolve()}\n"
+        )
+        git("remote", "add", "upstream", upstream_url, cwd=feedstock_dir)
+        git("remote", "add", "origin", origin_url, cwd=feedstock_dir)
+        # Blobs missing from both object stores are fetched from upstream
+        git(
+            "fetch",
+            "--quiet",
+            f"--filter={PARTIAL_CLONE_FILTER}",
+            "upstream",
+            "main",
+            cwd=feedstock_dir,
+            retries=2,
+        )
+        git("sparse-checkout", "set", "--no-cone", SPARSE_PATTERN, cwd=feedstock_dir)
+        git(
+            "checkout",
+            "--quiet",
+            "-B",
+            "main",
+            "--track",
+            "upstream/main",
+            cwd=feedstock_dir,
+        )
+    return feedstock_dir
+
+
+def get_feedstock(package_name, username, workspace_dir=None):
+    """Return the workspace clone of a feedstock, cloning it on first use."""
+    workspace_dir = Path(workspace_dir or DEFAULT_WORKSPACE_DIR)
+    feedstock_dir = workspace_dir / f"{package_name}-feedstock"
+    if is_clone(feedstock_dir):
+        return feedstock_dir
+    return clone_feedstock(package_name, username, workspace_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Clone feedstocks into the cf_release.py workspace ahead of time."
+    )
+    parser.add_argument("package_names", nargs="+", metavar="package_name")
+    parser.add_argument(
+        "--username",
+        required=True,
+        help="GitHub username owning the feedstock forks used as origin.",
+    )
+    parser.add_argument(
+        "--workspace",
+        type=Path,
+        default=DEFAULT_WORKSPACE_DIR,
+        help=f"Workspace directory (default: {DEFAULT_WORKSPACE_DIR}).",
+    )
+    args = parser.parse_args()
+    for package_name in args.package_names:
+        print(get_feedstock(package_name, args.username, args.workspace))
+
+
+if __name__ == "__main__":
+    main()